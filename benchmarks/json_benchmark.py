@@ -0,0 +1,95 @@
+"""
+Microbenchmark of the JSON layer against the stdlib/DRF defaults.
+
+Usage:
+    python benchmarks/json_benchmark.py
+"""
+
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "neon.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import json  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from neon.renderers import FastJSONRenderer  # noqa: E402
+from neon.utils.parsing_tools import orjson, stringify_json  # noqa: E402
+
+NUMBER = 2000
+
+
+def message_page(size=50):
+    # Shape of a MessageSerializer page
+    return {
+        "count": 1000,
+        "next": "http://localhost/api/messenger/x/?page=2",
+        "previous": None,
+        "results": [
+            {
+                "message_id": str(uuid.uuid4()),
+                "pending_id": str(uuid.uuid4()),
+                "message_type": "ai_reply" if i % 2 else "text",
+                "content": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4,
+                "token_count": 58,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "replying_to": None,
+                "deleted_at": None,
+                "conversation": str(uuid.uuid4()),
+                "sender": str(uuid.uuid4()) if i % 2 == 0 else None,
+                "agent": 3 if i % 2 else None,
+                "deleted_by": None,
+                "receivers": [str(uuid.uuid4())],
+                "seeners": [str(uuid.uuid4())],
+            }
+            for i in range(size)
+        ],
+    }
+
+
+def report(name, baseline, candidate):
+    base = timeit.timeit(baseline, number=NUMBER)
+    fast = timeit.timeit(candidate, number=NUMBER)
+    print(
+        f"{name:<24} stdlib {base / NUMBER * 1e6:9.2f} us   "
+        f"fast {fast / NUMBER * 1e6:9.2f} us   x{base / fast:5.1f}"
+    )
+
+
+def main():
+    print(f"orjson available: {orjson is not None}")
+
+    page = message_page()
+    default_renderer = JSONRenderer()
+    fast_renderer = FastJSONRenderer()
+    report(
+        "render message page",
+        lambda: default_renderer.render(page),
+        lambda: fast_renderer.render(page),
+    )
+
+    frame = {"status": True, "token": " the"}
+    report(
+        "encode SSE frame",
+        lambda: f"data: {json.dumps(frame)}\n\n",
+        lambda: f"data: {stringify_json(frame)}\n\n",
+    )
+
+    body = json.dumps(page)
+    report(
+        "parse message page",
+        lambda: json.loads(body),
+        lambda: orjson.loads(body) if orjson else json.loads(body),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark of retrieval memory search over one memory-mapped scope.
+
+Usage:
+    python benchmarks/memory_index_benchmark.py [vectors] [dimensions]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "neon.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from llm.utils.embeddings import normalize_rows  # noqa: E402
+from messenger.services.memory_index import ScopeIndex  # noqa: E402
+
+BATCH = 100_000
+QUERIES = 50
+TOP_K = 11
+
+
+def fill(index, count, dimensions):
+    rng = np.random.default_rng(0)
+    for start in range(0, count, BATCH):
+        vectors = normalize_rows(
+            rng.standard_normal((min(BATCH, count - start), dimensions), np.float32)
+        )
+        rows = [
+            (start + offset + 1, vector.tobytes())
+            for offset, vector in enumerate(vectors)
+        ]
+        index.sync(lambda floor, known, rows=rows: rows)
+
+
+def timed(callable_, number):
+    durations = []
+    for _ in range(number):
+        started = time.perf_counter()
+        callable_()
+        durations.append(time.perf_counter() - started)
+    durations.sort()
+    return durations[len(durations) // 2], durations[int(len(durations) * 0.95)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    dimensions = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = ScopeIndex(Path(directory) / "scope")
+
+        started = time.perf_counter()
+        fill(index, count, dimensions)
+        print(
+            f"{count} x {dimensions} vectors written in "
+            f"{time.perf_counter() - started:.1f} s "
+            f"({os.path.getsize(index.vectors_path) / 2**20:.0f} MiB)"
+        )
+
+        rng = np.random.default_rng(1)
+        queries = normalize_rows(
+            rng.standard_normal((QUERIES, dimensions), np.float32)
+        )
+        # First search maps the files and faults the pages in
+        index.search(queries[0], TOP_K)
+
+        iterator = iter(queries)
+        median, p95 = timed(lambda: index.search(next(iterator), TOP_K), QUERIES)
+        print(f"search top {TOP_K}: median {median * 1e3:.2f} ms, p95 {p95 * 1e3:.2f} ms")
+
+        # Catching up on the rows of one chat turn, as recall does per request
+        next_id = count + 1
+        vectors = normalize_rows(rng.standard_normal((2, dimensions), np.float32))
+
+        def sync_turn():
+            nonlocal next_id
+            rows = [(next_id + i, vector.tobytes()) for i, vector in enumerate(vectors)]
+            next_id += len(rows)
+            index.sync(lambda floor, known: rows)
+
+        median, p95 = timed(sync_turn, QUERIES)
+        print(f"sync 2 rows:  median {median * 1e3:.2f} ms, p95 {p95 * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('llm', '0008_model_service'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='model',
+            name='context_limit',
+            field=models.PositiveIntegerField(default=8192, help_text='Maximum context window of the model in tokens'),
+        ),
+    ]
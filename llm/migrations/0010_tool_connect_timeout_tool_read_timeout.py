@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('llm', '0009_model_context_limit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tool',
+            name='connect_timeout',
+            field=models.FloatField(default=3.0, help_text='Seconds to wait for a connection to the endpoint'),
+        ),
+        migrations.AddField(
+            model_name='tool',
+            name='read_timeout',
+            field=models.FloatField(default=10.0, help_text='Seconds to wait for the endpoint to respond'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('llm', '0010_tool_connect_timeout_tool_read_timeout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tool',
+            name='cache_max_bytes',
+            field=models.PositiveIntegerField(default=65536, help_text='Responses larger than this are not cached'),
+        ),
+        migrations.AddField(
+            model_name='tool',
+            name='cache_ttl',
+            field=models.PositiveIntegerField(default=0, help_text='Seconds to cache responses of GET tools, 0 disables caching'),
+        ),
+        migrations.AddField(
+            model_name='tool',
+            name='cache_vary_headers',
+            field=models.JSONField(blank=True, help_text='Names of request headers whose values are part of the cache key', null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('llm', '0011_tool_cache_max_bytes_tool_cache_ttl_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agent',
+            name='response_cache_include_context',
+            field=models.BooleanField(default=False, help_text='Only reuse replies when the conversation context is identical too'),
+        ),
+        migrations.AddField(
+            model_name='agent',
+            name='response_cache_ttl',
+            field=models.PositiveIntegerField(default=0, help_text='Seconds to reuse replies to identical prompts, 0 disables the cache. Never used while the role has POST tools enabled'),
+        ),
+    ]
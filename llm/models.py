@@ -35,6 +35,24 @@ class Tool(models.Model):
     requires_auth = models.BooleanField(default=False)
     is_enabled = models.BooleanField(default=False)
     authentication = models.TextField(blank=True)
+    connect_timeout = models.FloatField(
+        default=3.0, help_text="Seconds to wait for a connection to the endpoint"
+    )
+    read_timeout = models.FloatField(
+        default=10.0, help_text="Seconds to wait for the endpoint to respond"
+    )
+    cache_ttl = models.PositiveIntegerField(
+        default=0,
+        help_text="Seconds to cache responses of GET tools, 0 disables caching",
+    )
+    cache_max_bytes = models.PositiveIntegerField(
+        default=65536, help_text="Responses larger than this are not cached"
+    )
+    cache_vary_headers = models.JSONField(
+        blank=True,
+        null=True,
+        help_text="Names of request headers whose values are part of the cache key",
+    )
 
     def __str__(self):
         return self.name
@@ -71,6 +89,15 @@ class Agent(models.Model):
         Role, on_delete=models.SET_NULL, null=True, blank=True, related_name="agents"
     )
     is_active = models.BooleanField(default=True)
+    response_cache_ttl = models.PositiveIntegerField(
+        default=0,
+        help_text="Seconds to reuse replies to identical prompts, 0 disables the "
+        "cache. Never used while the role has POST tools enabled",
+    )
+    response_cache_include_context = models.BooleanField(
+        default=False,
+        help_text="Only reuse replies when the conversation context is identical too",
+    )
     created_by = models.ForeignKey(
         Account,
         on_delete=models.SET_NULL,
@@ -103,3 +130,6 @@ class Model(models.Model):
         related_name="llm_service",
     )
     model = models.CharField(max_length=255)
+    context_limit = models.PositiveIntegerField(
+        default=8192, help_text="Maximum context window of the model in tokens"
+    )
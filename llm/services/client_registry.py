@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from django.conf import settings
+import asyncio
+import hashlib
+import threading
+import weakref
+import httpx
+
+
+def fingerprint(api_key):
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+class ClientRegistry:
+    """
+    Process-wide pool of provider SDK clients keyed by (client class, API key
+    fingerprint).
+
+    Reusing a client keeps its httpx connection pool, so chat turns of the same
+    organization skip the TLS handshake to the provider. Async clients are
+    additionally keyed by the running event loop, since their connections
+    cannot be shared across loops. The least recently used client is dropped
+    once LLM_CLIENT_REGISTRY_SIZE is exceeded.
+
+    Dropped clients are never closed by the registry, a request may still be
+    streaming through them. A sync client's connections are closed once its
+    last user releases it, async ones with their event loop.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def limits(self):
+        return httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+        )
+
+    def timeout(self):
+        return httpx.Timeout(
+            settings.LLM_HTTP_READ_TIMEOUT, connect=settings.LLM_HTTP_CONNECT_TIMEOUT
+        )
+
+    def get(self, client_class, api_key):
+        return self._get(client_class, api_key, None, httpx.Client)
+
+    def get_async(self, client_class, api_key):
+        loop_id = id(asyncio.get_running_loop())
+        return self._get(client_class, api_key, loop_id, httpx.AsyncClient)
+
+    def _get(self, client_class, api_key, loop_id, http_client_class):
+        key = (client_class, fingerprint(api_key), loop_id)
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                return client
+
+            http_client = http_client_class(
+                limits=self.limits(), timeout=self.timeout()
+            )
+            client = client_class(api_key=api_key, http_client=http_client)
+            if http_client_class is httpx.Client:
+                weakref.finalize(client, http_client.close)
+            self._clients[key] = client
+
+            max_size = self.max_size or settings.LLM_CLIENT_REGISTRY_SIZE
+            while len(self._clients) > max_size:
+                self._clients.popitem(last=False)
+
+        return client
+
+    def evict(self, api_key):
+        """
+        Drops every client built for this API key, e.g. when an organization
+        rotates its key.
+        """
+        key_fingerprint = fingerprint(api_key)
+
+        with self._lock:
+            for key in list(self._clients):
+                if key[1] == key_fingerprint:
+                    del self._clients[key]
+
+
+client_registry = ClientRegistry()
@@ -0,0 +1,153 @@
+from dataclasses import asdict, dataclass
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from neon.utils.parsing_tools import dump_json
+from ..models import Agent, Model
+from ..serializers import ToolSerializer
+import hashlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "execution-plan:generation"
+
+# Bump when ExecutionPlan's fields change so plans cached in the old shape
+# are not loaded
+PLAN_FORMAT = 2
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """
+    Everything a chat turn needs to know about an agent/model pair.
+    """
+
+    agent_id: int
+    agent_uuid: str
+    system_prompt: str
+    tools: tuple
+    service: str
+    model: str
+    context_limit: int
+    response_cache_ttl: int
+    response_cache_include_context: bool
+    version: str
+
+    @property
+    def has_side_effects(self):
+        return any(tool["http_method"] != "GET" for tool in self.tools)
+
+
+def build_execution_plan(agent_uuid, model_uuid):
+    agent = Agent.objects.select_related("role").get(uuid=agent_uuid)
+    llm_model = Model.objects.select_related("service").get(uuid=model_uuid)
+
+    tools = []
+    if agent.role is not None:
+        tools = ToolSerializer(
+            agent.role.tools.filter(is_enabled=True).order_by("pk"), many=True
+        ).data
+
+    plan = {
+        "agent_id": agent.pk,
+        "agent_uuid": str(agent.uuid),
+        "system_prompt": agent.role.system_prompt if agent.role else "",
+        "tools": tuple(dict(tool) for tool in tools),
+        "service": llm_model.service.name if llm_model.service else None,
+        "model": llm_model.model,
+        "context_limit": llm_model.context_limit,
+        "response_cache_ttl": agent.response_cache_ttl,
+        "response_cache_include_context": agent.response_cache_include_context,
+    }
+    plan["version"] = hashlib.sha256(dump_json(plan, sort_keys=True)).hexdigest()[
+        :16
+    ]
+
+    return ExecutionPlan(**plan)
+
+
+class ExecutionPlanCache:
+    """
+    Two-tier cache of ExecutionPlans: in-process dict, then Redis.
+
+    Plans are keyed by a global generation number kept in Redis. Any change to
+    an Agent, Role, Tool, Model or Service bumps the generation (see
+    llm/signals.py), which orphans every cached plan at once; config changes
+    are rare enough that finer invalidation is not worth it. Other processes
+    notice the new generation within EXECUTION_PLAN_GENERATION_TTL seconds.
+    """
+
+    def __init__(self):
+        self._plans = {}
+        self._lock = threading.Lock()
+        self._generation = None
+        self._generation_checked_at = 0
+
+    def generation(self):
+        now = time.monotonic()
+        if (
+            self._generation is None
+            or now - self._generation_checked_at
+            >= settings.EXECUTION_PLAN_GENERATION_TTL
+        ):
+            value = get_redis_connection("default").get(GENERATION_KEY)
+            generation = int(value) if value else 0
+            with self._lock:
+                if generation != self._generation:
+                    self._plans = {}
+                self._generation = generation
+                self._generation_checked_at = now
+        return self._generation
+
+    def get(self, agent_uuid, model_uuid):
+        try:
+            generation = self.generation()
+        except Exception as ex:
+            logger.warning("Execution plan cache unavailable: %s", ex)
+            return build_execution_plan(agent_uuid, model_uuid)
+
+        key = (str(agent_uuid), str(model_uuid))
+        plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+
+        redis_key = f"execution-plan:v{PLAN_FORMAT}:{generation}:{key[0]}:{key[1]}"
+        try:
+            cached = cache.get(redis_key)
+        except Exception as ex:
+            logger.warning("Execution plan cache unavailable: %s", ex)
+            cached = None
+
+        if cached is not None:
+            plan = ExecutionPlan(**{**cached, "tools": tuple(cached["tools"])})
+        else:
+            plan = build_execution_plan(agent_uuid, model_uuid)
+            try:
+                cache.set(
+                    redis_key, asdict(plan), timeout=settings.EXECUTION_PLAN_CACHE_TTL
+                )
+            except Exception as ex:
+                logger.warning("Execution plan cache unavailable: %s", ex)
+
+        with self._lock:
+            self._plans[key] = plan
+        return plan
+
+    def invalidate(self):
+        with self._lock:
+            self._plans = {}
+            self._generation = None
+        try:
+            get_redis_connection("default").incr(GENERATION_KEY)
+        except Exception as ex:
+            logger.warning("Failed to invalidate execution plans: %s", ex)
+
+
+execution_plan_cache = ExecutionPlanCache()
+
+
+def get_execution_plan(agent_uuid, model_uuid):
+    return execution_plan_cache.get(agent_uuid, model_uuid)
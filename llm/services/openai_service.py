@@ -1,96 +1,67 @@
-from openai import OpenAI  # assuming you use OpenAI's official Python client
-from ..utils.function_calls import trigger_function
-import json
+from openai import OpenAI, AsyncOpenAI  # assuming you use OpenAI's official Python client
+from ..utils.tool_calls import (
+    ToolCallAccumulator,
+    aexecute_tool_calls,
+    build_tool_messages,
+    execute_tool_calls,
+    tool_options,
+)
+from .client_registry import client_registry
+from neon.utils.parsing_tools import stringify_json
 
 
 class OpenAIService:
-    client = None
-    model = None
-
     def __init__(self, api_key, model):
-        if self.client is None:
-            self.client = OpenAI(api_key=api_key)
-            self.model = model
-
-    def stream_chat_completion(
-        self, history, system_prompt, user_message, tool_response=None
-    ):
-        llm_encapsulated_tool_info = []
-        if tool_response:
-            llm_encapsulated_tool_info = [
-                {
-                    "type": "function",
-                    "name": tool["name"],
-                    "description": tool["description"],
-                    "parameters": tool["parameters_schema"],
-                }
-                for tool in tool_response
-            ]
+        # Clients are pooled per API key, see client_registry
+        self.client = client_registry.get(OpenAI, api_key)
+        self.model = model
+        self.api_key = api_key
+
+    @property
+    def async_client(self):
+        return client_registry.get_async(AsyncOpenAI, self.api_key)
 
+    def build_messages(self, history, system_prompt, user_message, toolset):
         messages = history + [
             {
                 "role": "system",
-                "content": f"{system_prompt}, these are the tools available for you to use, {json.dumps(llm_encapsulated_tool_info, indent=2)}. Always check these tools when asked for your capability no matter what the history in the conversation says.",
+                "content": f"{system_prompt}, these are the tools available for you to use, {toolset.prompt_fragment}. Always check these tools when asked for your capability no matter what the history in the conversation says.",
             },
             {"role": "user", "content": user_message},
         ]
 
+        return messages
+
+    def stream_chat_completion(self, history, system_prompt, user_message, toolset):
+        messages = self.build_messages(history, system_prompt, user_message, toolset)
+
         completion = self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             stream=True,
-            functions=llm_encapsulated_tool_info,
-            function_call="auto",
+            **tool_options(toolset),
         )
 
-        accumulated_args = ""
-        current_function_name = None
+        accumulator = ToolCallAccumulator()
 
         for chunk in completion:
+            if not chunk.choices:
+                continue
             delta = chunk.choices[0].delta
 
-            # If there's a function call delta part
-            if hasattr(delta, "function_call") and delta.function_call:
-                # If function name is present, start a new accumulation
-                if delta.function_call.name:
-                    current_function_name = delta.function_call.name
-                    # accumulated_args = ""  # reset for new call
-
-                # Accumulate argument chunks safely
-                if delta.function_call.arguments:
-                    accumulated_args += delta.function_call.arguments
-
+            # Tool calls arrive as fragments spread over several chunks
+            if delta.tool_calls:
+                accumulator.add(delta.tool_calls)
             else:
                 # Normal content chunk, yield directly
                 yield delta.content
 
-        # When the last chunk has arrived (detected by absence of new arguments or some end condition),
-        # parse and trigger the function call
-        if current_function_name and accumulated_args:
-            # parse accumulated args if any, else empty dict
-            args = json.loads(accumulated_args)
-
-            current_tool = [
-                tool for tool in tool_response if tool["name"] == current_function_name
-            ][0]
-
-            response = trigger_function(
-                "api_call",
-                current_tool["http_method"],
-                current_tool["api_endpoint"],
-                args,
-                current_tool["param_type"],
-                current_tool["headers_schema"],
-            )
-
-            messages.append(
-                {
-                    "role": "system",
-                    "content": f"this is the request response of {current_function_name}: "
-                    f"{json.dumps(response)}, understand the message and give a human readable feedback about the user's request. "
-                    "Inform them what is the result of the requested process after this attempt",
-                }
-            )
+        # Once the stream is complete, run every requested tool call
+        # concurrently and continue with all of their results at once
+        calls = accumulator.result()
+        if calls:
+            results = execute_tool_calls(calls, toolset)
+            messages.extend(build_tool_messages(calls, results))
 
             followup_response = self.client.chat.completions.create(
                 model=self.model,
@@ -98,21 +69,60 @@ class OpenAIService:
                 stream=True,
             )
 
-            # Reset after completion
-            current_function_name = None
-            accumulated_args = ""
-
             for followup in followup_response:
+                if not followup.choices:
+                    continue
                 delta_followup = followup.choices[0].delta
                 yield delta_followup.content
 
+    async def astream_chat_completion(self, history, system_prompt, user_message, toolset):
+        """
+        Async counterpart of stream_chat_completion for the ASGI chat endpoint.
+        """
+        messages = self.build_messages(history, system_prompt, user_message, toolset)
+
+        completion = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            **tool_options(toolset),
+        )
+
+        accumulator = ToolCallAccumulator()
+
+        async for chunk in completion:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+
+            if delta.tool_calls:
+                accumulator.add(delta.tool_calls)
+            else:
+                yield delta.content
+
+        calls = accumulator.result()
+        if calls:
+            results = await aexecute_tool_calls(calls, toolset)
+            messages.extend(build_tool_messages(calls, results))
+
+            followup_response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                stream=True,
+            )
+
+            async for followup in followup_response:
+                if not followup.choices:
+                    continue
+                yield followup.choices[0].delta.content
+
     def summarize_messages(self, messages):
         # Compose prompt directing chat model to summarize
         prompt = (
             "Summarize these messages into a short and detailed summary "
             "suitable for history referencing, including important info: "
         )
-        full_input = prompt + "\n\nMessages:\n" + json.dumps(messages)
+        full_input = prompt + "\n\nMessages:\n" + stringify_json(messages)
 
         response = self.client.chat.completions.create(
             model=self.model,
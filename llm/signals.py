@@ -0,0 +1,38 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from organization.models import Organization
+from .models import Agent, Model, Role, Service, Tool
+from .services.client_registry import client_registry
+from .services.execution_plan import execution_plan_cache
+
+
+@receiver(pre_save, sender=Organization)
+def evict_rotated_llm_client(sender, instance, **kwargs):
+    if not instance.pk:
+        return
+
+    previous_key = (
+        Organization.objects.filter(pk=instance.pk)
+        .values_list("llm_api_key", flat=True)
+        .first()
+    )
+
+    if previous_key and previous_key != instance.llm_api_key:
+        client_registry.evict(previous_key)
+
+
+@receiver(post_save, sender=Agent)
+@receiver(post_save, sender=Role)
+@receiver(post_save, sender=Tool)
+@receiver(post_save, sender=Model)
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Agent)
+@receiver(post_delete, sender=Role)
+@receiver(post_delete, sender=Tool)
+@receiver(post_delete, sender=Model)
+@receiver(post_delete, sender=Service)
+@receiver(m2m_changed, sender=Role.tools.through)
+def invalidate_execution_plans(sender, **kwargs):
+    if kwargs.get("action", "post_").startswith("pre_"):
+        return
+    execution_plan_cache.invalidate()
@@ -1,3 +1,114 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
+from llm.utils.tool_calls import ToolCallAccumulator
+from llm.utils.tool_schemas import CompiledTool, fallback_validator
+from types import SimpleNamespace
 
-# Create your tests here.
+
+def delta(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(
+        index=index,
+        id=id,
+        function=SimpleNamespace(name=name, arguments=arguments),
+    )
+
+
+def compiled_tool(schema):
+    return CompiledTool(
+        {"name": "weather", "description": "Weather", "parameters_schema": schema}
+    )
+
+
+WEATHER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "city": {"type": "string"},
+        "days": {"type": "integer"},
+        "metric": {"type": "boolean", "default": True},
+    },
+    "required": ["city", "days"],
+    "additionalProperties": False,
+}
+
+
+class ToolCallAccumulatorTests(SimpleTestCase):
+    def test_joins_argument_fragments(self):
+        accumulator = ToolCallAccumulator()
+        accumulator.add([delta(0, id="call_a", name="weather", arguments='{"ci')])
+        accumulator.add([delta(0, arguments='ty": "Par')])
+        accumulator.add([delta(0, arguments='is"}')])
+
+        self.assertEqual(
+            accumulator.result(),
+            [{"id": "call_a", "name": "weather", "arguments": '{"city": "Paris"}'}],
+        )
+
+    def test_interleaved_calls_are_ordered_by_index(self):
+        accumulator = ToolCallAccumulator()
+        accumulator.add(
+            [
+                delta(1, id="call_b", name="time", arguments="{}"),
+                delta(0, id="call_a", name="weather", arguments='{"city"'),
+            ]
+        )
+        accumulator.add([delta(0, arguments=': "Oslo"}')])
+
+        self.assertEqual(
+            [call["id"] for call in accumulator.result()], ["call_a", "call_b"]
+        )
+        self.assertEqual(accumulator.result()[0]["arguments"], '{"city": "Oslo"}')
+
+    def test_missing_id_falls_back_to_index(self):
+        accumulator = ToolCallAccumulator()
+        accumulator.add([SimpleNamespace(index=2, id=None, function=None)])
+        accumulator.add([delta(2, name="ping")])
+
+        self.assertEqual(
+            accumulator.result(), [{"id": "call_2", "name": "ping", "arguments": ""}]
+        )
+
+
+class CompiledToolTests(SimpleTestCase):
+    def test_valid_arguments_pass_unchanged(self):
+        arguments = {"city": "Paris", "days": 3, "metric": False}
+
+        self.assertEqual(
+            compiled_tool(WEATHER_SCHEMA).validate(arguments), (arguments, None)
+        )
+
+    def test_repairs_types_defaults_and_extra_properties(self):
+        arguments, error = compiled_tool(WEATHER_SCHEMA).validate(
+            {"city": 75001, "days": "3", "units": "C"}
+        )
+
+        self.assertIsNone(error)
+        self.assertEqual(arguments, {"city": "75001", "days": 3, "metric": True})
+
+    def test_repairs_boolean_strings(self):
+        arguments, error = compiled_tool(WEATHER_SCHEMA).validate(
+            {"city": "Paris", "days": 1, "metric": "False"}
+        )
+
+        self.assertIsNone(error)
+        self.assertIs(arguments["metric"], False)
+
+    def test_unrepairable_arguments_return_an_error(self):
+        tool = compiled_tool(WEATHER_SCHEMA)
+
+        arguments, error = tool.validate({"city": "Paris", "days": "three"})
+        self.assertIsNone(arguments)
+        self.assertIn("days", error)
+
+        arguments, error = tool.validate({"days": 3})
+        self.assertIsNone(arguments)
+        self.assertIn("city", error)
+
+    def test_fallback_validator(self):
+        validate = fallback_validator(WEATHER_SCHEMA)
+
+        arguments = {"city": "Paris", "days": 2}
+
+        self.assertEqual(validate(arguments), arguments)
+        with self.assertRaises(ValueError):
+            validate({"city": "Paris", "days": True})
+        with self.assertRaises(ValueError):
+            validate({"days": 2})
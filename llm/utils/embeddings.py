@@ -0,0 +1,76 @@
+from django.conf import settings
+from openai import OpenAI
+from ..services.client_registry import client_registry
+import hashlib
+import numpy as np
+import re
+
+WORD = re.compile(r"\w+")
+
+
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+class HashingEmbedder:
+    """
+    Offline embedder: words and word pairs are hashed into a fixed number of
+    signed buckets, weighted by log term frequency. No model or network call,
+    so it is cheap enough to run on every saved message. It only captures
+    lexical overlap, use a provider embedder for semantic recall.
+    """
+
+    def __init__(self, dimensions=None):
+        self.dimensions = dimensions or settings.MEMORY_EMBEDDING_DIMENSIONS
+        self.name = f"hashing-{self.dimensions}"
+
+    def features(self, text):
+        words = WORD.findall((text or "").lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            counts = {}
+            for feature in self.features(text):
+                counts[feature] = counts.get(feature, 0) + 1
+
+            for feature, count in counts.items():
+                digest = int.from_bytes(
+                    hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(),
+                    "little",
+                )
+                sign = 1 if digest & 1 else -1
+                vectors[row, (digest >> 1) % self.dimensions] += sign * (
+                    1 + np.log(count)
+                )
+
+        return normalize_rows(vectors)
+
+
+class OpenAIEmbedder:
+    """
+    Embeds through an OpenAI compatible embeddings endpoint with the
+    organization's API key.
+    """
+
+    def __init__(self, api_key, model=None):
+        self.client = client_registry.get(OpenAI, api_key)
+        self.model = model or settings.MEMORY_EMBEDDING_MODEL
+        self.name = f"openai-{self.model}"
+
+    def embed(self, texts):
+        response = self.client.embeddings.create(model=self.model, input=list(texts))
+        vectors = np.array(
+            [item.embedding for item in response.data], dtype=np.float32
+        )
+        return normalize_rows(vectors)
+
+
+def get_embedder(api_key=None):
+    if settings.MEMORY_EMBEDDER == "openai" and api_key:
+        return OpenAIEmbedder(api_key)
+    return HashingEmbedder()
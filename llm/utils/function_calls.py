@@ -1,23 +1,80 @@
+from .http_sessions import session_manager
+from django.conf import settings
+import random
+import time
 import requests
 
+RETRY_STATUSES = (429, 502, 503, 504)
 
-def api_call(method, url, parameters, param_type, headers=None):
+
+def backoff_delay(attempt):
+    # Full jitter: spreads retries of concurrent callers over the whole window
+    ceiling = min(
+        settings.TOOL_HTTP_RETRY_BACKOFF_MAX,
+        settings.TOOL_HTTP_RETRY_BACKOFF * (2**attempt),
+    )
+    return random.uniform(0, ceiling)
+
+
+def send_request(method, url, retries=0, **kwargs):
+    """
+    Sends a request through the pooled session of the URL's host, retrying
+    connection errors, timeouts and retryable statuses up to retries times.
+    """
+    session = session_manager.get(url)
+
+    for attempt in range(retries + 1):
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= retries:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                return response
+
+        time.sleep(backoff_delay(attempt))
+
+
+def api_call(method, url, parameters, param_type, headers=None, timeout=None):
     method = method.upper()
+    if timeout is None:
+        timeout = (settings.TOOL_HTTP_CONNECT_TIMEOUT, settings.TOOL_HTTP_READ_TIMEOUT)
     try:
         if method == "GET":
+            # GETs are idempotent, so they are safe to retry
+            retries = settings.TOOL_HTTP_GET_RETRIES
             if param_type == "query":
                 # For GET, send parameters as query string
-                response = requests.get(url, params=parameters, headers=headers)
+                response = send_request(
+                    "GET",
+                    url,
+                    retries=retries,
+                    params=parameters,
+                    headers=headers,
+                    timeout=timeout,
+                )
             elif param_type == "route":
                 url = url.format(**parameters)
                 # For GET, send parameters as route string
-                response = requests.get(url, headers=headers)
+                response = send_request(
+                    "GET", url, retries=retries, headers=headers, timeout=timeout
+                )
             else:
                 # For GET, send parameters as query string
-                response = requests.get(url, params=parameters, headers=headers)
+                response = send_request(
+                    "GET",
+                    url,
+                    retries=retries,
+                    params=parameters,
+                    headers=headers,
+                    timeout=timeout,
+                )
         elif method == "POST":
             # For POST, send parameters as JSON body
-            response = requests.post(url, json=parameters, headers=headers)
+            response = send_request(
+                "POST", url, json=parameters, headers=headers, timeout=timeout
+            )
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
 
@@ -36,7 +93,7 @@ def api_call(method, url, parameters, param_type, headers=None):
         return {"error": str(e)}
 
 
-def trigger_function(func, method, url, parameters, param_type, headers):
+def trigger_function(func, method, url, parameters, param_type, headers, timeout=None):
 
     if func == "api_call":
         return api_call(
@@ -45,4 +102,5 @@ def trigger_function(func, method, url, parameters, param_type, headers):
             parameters=parameters,
             param_type=param_type,
             headers=headers,
+            timeout=timeout,
         )
@@ -0,0 +1,59 @@
+from django.conf import settings
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+import threading
+import requests
+
+
+class SessionManager:
+    """
+    Keeps one requests.Session per scheme and host, so tool calls to the same
+    API reuse warm keep-alive connections instead of opening a new TCP+TLS
+    connection every time. Sessions are shared across threads, each adapter
+    holds up to TOOL_HTTP_POOL_MAXSIZE connections to its host.
+
+    A session is shared by every tool, organization and user calling its host,
+    so its cookie jar accepts no cookies: like the stateless requests.get/post
+    calls, a cookie set by one response is never sent with another request.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+
+        session = self._sessions.get(key)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                # Retries are handled by the caller, only idempotent requests
+                # are retried
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.TOOL_HTTP_POOL_MAXSIZE,
+                    max_retries=0,
+                )
+                session.mount(f"{parts.scheme}://", adapter)
+                self._sessions[key] = session
+
+        return session
+
+    def close(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions = {}
+
+        for session in sessions:
+            session.close()
+
+
+session_manager = SessionManager()
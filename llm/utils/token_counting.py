@@ -0,0 +1,27 @@
+import math
+
+# Rough average for English text across the tokenizers we use (Llama, GPT).
+# Good enough for budgeting, not for billing.
+CHARS_PER_TOKEN = 4
+
+# Role markers and separators each chat message costs on top of its content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text):
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """
+    Keeps the end of the text so that it fits in max_tokens. The end is kept
+    because it is the part closest to the rest of the conversation.
+    """
+    if max_tokens <= 0:
+        return ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return "..." + text[-(max_chars - 3) :]
@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from neon.utils.cache_tools import LocalLRU
+from neon.utils.parsing_tools import dump_json, parse_json
+from collections import Counter
+import hashlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "tool-cache:stats"
+
+
+class ToolResultCache:
+    """
+    Opt-in response cache for idempotent GET tools (Tool.cache_ttl > 0).
+
+    Results are keyed by tool, normalized parameters and the values of the
+    tool's cache_vary_headers, kept for cache_ttl seconds in the CACHES Redis
+    with a local LRU in front. Error results and payloads larger than
+    cache_max_bytes are never cached. Hits and misses are counted per tool in
+    process and added to Redis at most every TOOL_CACHE_STATS_INTERVAL seconds.
+    """
+
+    def __init__(self, max_local_entries=None, stats_interval=None):
+        self.local = LocalLRU(
+            max_local_entries or settings.TOOL_CACHE_LOCAL_MAX_ENTRIES
+        )
+        self.stats_interval = stats_interval
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def is_cacheable(self, tool):
+        return tool["http_method"] == "GET" and (tool.get("cache_ttl") or 0) > 0
+
+    def key(self, tool, parameters):
+        headers = tool["headers_schema"] or {}
+        vary = {name: headers.get(name) for name in tool.get("cache_vary_headers") or []}
+        digest = hashlib.sha256(
+            dump_json(
+                [tool["name"], tool["api_endpoint"], parameters, vary], sort_keys=True
+            )
+        ).hexdigest()
+        return f"tool-cache:{tool['name']}:{digest}"
+
+    def get(self, tool, parameters):
+        key = self.key(tool, parameters)
+
+        payload = self.local.get(key)
+        if payload is None:
+            try:
+                payload = cache.get(key)
+                # Kept locally only for what is left of the Redis entry's TTL
+                ttl = cache.ttl(key) if payload is not None else 0
+            except Exception as ex:
+                logger.warning("Tool cache unavailable: %s", ex)
+                payload, ttl = None, 0
+            if ttl is None:
+                ttl = tool["cache_ttl"]
+            if payload is not None and ttl > 0:
+                self.local.set(key, payload, min(ttl, tool["cache_ttl"]))
+
+        self.count(tool, "hits" if payload is not None else "misses")
+        return None if payload is None else parse_json(payload)
+
+    def set(self, tool, parameters, result):
+        if isinstance(result, dict) and "error" in result:
+            return False
+
+        payload = dump_json(result)
+        if len(payload) > tool.get("cache_max_bytes", settings.TOOL_CACHE_MAX_BYTES):
+            return False
+
+        key = self.key(tool, parameters)
+        self.local.set(key, payload, tool["cache_ttl"])
+        try:
+            cache.set(key, payload, timeout=tool["cache_ttl"])
+        except Exception as ex:
+            logger.warning("Tool cache unavailable: %s", ex)
+        return True
+
+    def count(self, tool, outcome):
+        interval = self.stats_interval or settings.TOOL_CACHE_STATS_INTERVAL
+        with self._lock:
+            self._counts[f"{tool['name']}:{outcome}"] += 1
+            current = time.monotonic()
+            if current - self._flushed_at < interval:
+                return
+            counts, self._counts = self._counts, Counter()
+            self._flushed_at = current
+
+        self.flush_counts(counts)
+
+    def flush_counts(self, counts=None):
+        if counts is None:
+            with self._lock:
+                counts, self._counts = self._counts, Counter()
+                self._flushed_at = time.monotonic()
+        if not counts:
+            return
+
+        try:
+            pipeline = get_redis_connection("default").pipeline()
+            for field, value in counts.items():
+                pipeline.hincrby(STATS_KEY, field, value)
+            pipeline.execute()
+        except Exception as ex:
+            logger.warning("Failed to record tool cache stats: %s", ex)
+
+    def stats(self):
+        """
+        Returns:
+            dict: {tool name: {"hits": int, "misses": int}}
+        """
+        self.flush_counts()
+        counters = get_redis_connection("default").hgetall(STATS_KEY)
+        stats = {}
+        for field, value in counters.items():
+            name, outcome = field.decode("utf-8").rsplit(":", 1)
+            stats.setdefault(name, {"hits": 0, "misses": 0})[outcome] = int(value)
+        return stats
+
+
+tool_result_cache = ToolResultCache()
@@ -0,0 +1,186 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from django.conf import settings
+from neon.utils.parsing_tools import parse_json, stringify_json
+from .function_calls import trigger_function
+from .tool_cache import tool_result_cache
+import asyncio
+import time
+
+FOLLOWUP_INSTRUCTION = (
+    "The tool results above are the responses to the requested tool calls, "
+    "understand them and give a human readable feedback about the user's request. "
+    "Inform them what is the result of the requested process after this attempt"
+)
+
+# Shared by every request of the process so concurrent turns cannot start an
+# unbounded number of outgoing tool requests.
+executor = ThreadPoolExecutor(
+    max_workers=settings.LLM_TOOL_CALL_MAX_WORKERS, thread_name_prefix="tool-call"
+)
+
+
+def tool_options(toolset):
+    # Providers reject an empty tools list
+    if not toolset:
+        return {}
+    return {"tools": toolset.definitions, "tool_choice": "auto"}
+
+
+class ToolCallAccumulator:
+    """
+    Reassembles streamed tool call deltas. Providers send the id and name in
+    the first delta of each call and the JSON arguments in fragments, all keyed
+    by the call's index.
+    """
+
+    def __init__(self):
+        self.calls = {}
+
+    def add(self, tool_call_deltas):
+        for delta in tool_call_deltas:
+            call = self.calls.setdefault(
+                delta.index, {"id": None, "name": "", "arguments": ""}
+            )
+            if delta.id:
+                call["id"] = delta.id
+            if delta.function is not None:
+                if delta.function.name:
+                    call["name"] += delta.function.name
+                if delta.function.arguments:
+                    call["arguments"] += delta.function.arguments
+
+    def result(self):
+        return [
+            {**call, "id": call["id"] or f"call_{index}"}
+            for index, call in sorted(self.calls.items())
+        ]
+
+
+def tool_timeout(tool):
+    """
+    Upper bound of a tool call: its HTTP timeouts for every attempt plus the
+    worst-case backoff between GET retries.
+    """
+    if tool is None:
+        return settings.LLM_TOOL_CALL_TIMEOUT
+
+    retries = settings.TOOL_HTTP_GET_RETRIES if tool["http_method"] == "GET" else 0
+    return (tool["connect_timeout"] + tool["read_timeout"]) * (
+        retries + 1
+    ) + settings.TOOL_HTTP_RETRY_BACKOFF_MAX * retries
+
+
+def find_tool(call, toolset):
+    compiled = toolset.get(call["name"])
+    return compiled.tool if compiled else None
+
+
+def run_tool_call(call, toolset):
+    compiled = toolset.get(call["name"])
+    if compiled is None:
+        return {"error": f"Unknown tool: {call['name']}"}
+
+    try:
+        arguments = parse_json(call["arguments"] or "{}")
+    except ValueError as ex:
+        return {"error": f"Invalid arguments for {call['name']}: {ex}"}
+
+    # Rejected locally instead of spending a round trip the endpoint would fail
+    arguments, error = compiled.validate(arguments)
+    if error:
+        return {"error": f"Invalid arguments for {call['name']}: {error}"}
+
+    current_tool = compiled.tool
+
+    cacheable = tool_result_cache.is_cacheable(current_tool)
+    if cacheable:
+        cached = tool_result_cache.get(current_tool, arguments)
+        if cached is not None:
+            return cached
+
+    result = trigger_function(
+        "api_call",
+        current_tool["http_method"],
+        current_tool["api_endpoint"],
+        arguments,
+        current_tool["param_type"],
+        current_tool["headers_schema"],
+        timeout=(current_tool["connect_timeout"], current_tool["read_timeout"]),
+    )
+
+    if cacheable:
+        tool_result_cache.set(current_tool, arguments, result)
+
+    return result
+
+
+def execute_tool_calls(calls, toolset):
+    """
+    Runs the tool calls of one turn concurrently on the shared executor, each
+    bounded by its own timeout.
+
+    Returns:
+        list: Results in the same order as calls.
+    """
+    started_at = time.monotonic()
+    futures = [executor.submit(run_tool_call, call, toolset) for call in calls]
+
+    results = []
+    for call, future in zip(calls, futures):
+        deadline = started_at + tool_timeout(find_tool(call, toolset))
+        try:
+            results.append(future.result(timeout=max(deadline - time.monotonic(), 0)))
+        except TimeoutError:
+            results.append({"error": f"{call['name']} timed out"})
+        except Exception as ex:
+            results.append({"error": str(ex)})
+
+    return results
+
+
+async def aexecute_tool_calls(calls, toolset):
+    """
+    Async counterpart of execute_tool_calls.
+    """
+    loop = asyncio.get_running_loop()
+
+    async def run(call):
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(executor, run_tool_call, call, toolset),
+                timeout=tool_timeout(find_tool(call, toolset)),
+            )
+        except asyncio.TimeoutError:
+            return {"error": f"{call['name']} timed out"}
+        except Exception as ex:
+            return {"error": str(ex)}
+
+    return await asyncio.gather(*(run(call) for call in calls))
+
+
+def build_tool_messages(calls, results):
+    """
+    Builds the assistant tool call message, one tool message per result and
+    the follow-up instruction, to be appended before the follow-up request.
+    """
+    messages = [
+        {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": call["id"],
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": call["arguments"]},
+                }
+                for call in calls
+            ],
+        }
+    ]
+    messages += [
+        {"role": "tool", "tool_call_id": call["id"], "content": stringify_json(result)}
+        for call, result in zip(calls, results)
+    ]
+    messages.append({"role": "system", "content": FOLLOWUP_INSTRUCTION})
+
+    return messages
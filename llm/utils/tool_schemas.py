@@ -0,0 +1,188 @@
+from collections import OrderedDict
+from neon.utils.parsing_tools import dump_json, stringify_json
+import hashlib
+import threading
+
+# fastjsonschema compiles a schema into plain Python code, validating in
+# microseconds. Without it only required properties and simple types are checked.
+try:
+    import fastjsonschema
+except ImportError:  # pragma: no cover
+    fastjsonschema = None
+
+TOOLSET_CACHE_SIZE = 256
+
+SIMPLE_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "object": dict,
+    "array": list,
+}
+
+
+def coerce(value, expected_type):
+    """
+    Repairs the common argument mistakes of models: numbers and booleans sent
+    as strings, and scalars sent where a string is expected.
+    """
+    if expected_type in ("integer", "number") and isinstance(value, str):
+        try:
+            number = float(value.strip())
+        except ValueError:
+            return value
+        if expected_type == "integer" and number.is_integer():
+            return int(number)
+        return number if expected_type == "number" else value
+    if expected_type == "boolean" and isinstance(value, str):
+        if value.strip().lower() in ("true", "false"):
+            return value.strip().lower() == "true"
+    if expected_type == "string" and isinstance(value, (int, float)):
+        if not isinstance(value, bool):
+            return str(value)
+    return value
+
+
+def fallback_validator(schema):
+    properties = schema.get("properties") or {}
+    required = schema.get("required") or []
+
+    def validate(arguments):
+        if not isinstance(arguments, dict):
+            raise ValueError("arguments must be an object")
+        for name in required:
+            if name not in arguments:
+                raise ValueError(f"data must contain ['{name}'] properties")
+        for name, value in arguments.items():
+            expected = SIMPLE_TYPES.get((properties.get(name) or {}).get("type"))
+            if expected is not None and (
+                not isinstance(value, expected)
+                or (isinstance(value, bool) and expected is not bool)
+            ):
+                raise ValueError(f"data.{name} must be {properties[name]['type']}")
+        return arguments
+
+    return validate
+
+
+class CompiledTool:
+    """
+    A serialized Tool with its chat completions definition and a compiled
+    validator for its parameters_schema.
+    """
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.name = tool["name"]
+        self.schema = tool["parameters_schema"] or {"type": "object"}
+        self.definition = {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": tool["description"],
+                "parameters": self.schema,
+            },
+        }
+        self.prompt_info = {
+            "name": self.name,
+            "description": tool["description"],
+            "parameters": tool["parameters_schema"],
+        }
+
+        if fastjsonschema is not None:
+            try:
+                self.validator = fastjsonschema.compile(self.schema)
+            except fastjsonschema.JsonSchemaDefinitionException:
+                self.validator = fallback_validator(self.schema)
+        else:
+            self.validator = fallback_validator(self.schema)
+
+    def repair(self, arguments):
+        if not isinstance(arguments, dict):
+            return arguments
+
+        properties = self.schema.get("properties") or {}
+        repaired = {}
+        for name, value in arguments.items():
+            expected_type = (properties.get(name) or {}).get("type")
+            repaired[name] = coerce(value, expected_type) if expected_type else value
+
+        for name, spec in properties.items():
+            if name not in repaired and isinstance(spec, dict) and "default" in spec:
+                repaired[name] = spec["default"]
+
+        if self.schema.get("additionalProperties") is False:
+            repaired = {
+                name: value for name, value in repaired.items() if name in properties
+            }
+
+        return repaired
+
+    def validate(self, arguments):
+        """
+        Validates the model's arguments, repairing them once if they do not
+        match the schema.
+
+        Returns:
+            tuple: (arguments, None) when valid, (None, error message) otherwise.
+        """
+        # fastjsonschema's exceptions are ValueErrors as well
+        try:
+            return self.validator(arguments), None
+        except ValueError:
+            pass
+
+        try:
+            return self.validator(self.repair(arguments)), None
+        except ValueError as ex:
+            return None, str(ex)
+
+
+class CompiledToolset:
+    """
+    Tools of an execution plan compiled once: the chat completions "tools"
+    payload shared by the OpenAI-compatible providers, the prompt fragment
+    describing them and a validator per tool.
+    """
+
+    def __init__(self, tools):
+        self.tools = {tool["name"]: CompiledTool(tool) for tool in tools or []}
+        self.definitions = [compiled.definition for compiled in self.tools.values()]
+        self.prompt_fragment = stringify_json(
+            [compiled.prompt_info for compiled in self.tools.values()]
+        )
+
+    def __bool__(self):
+        return bool(self.tools)
+
+    def get(self, name):
+        return self.tools.get(name)
+
+
+_toolsets = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_toolset(tools, version=None):
+    """
+    Returns the compiled toolset of the given serialized tools, reusing it for
+    as long as the tools do not change. version, e.g. the execution plan
+    version, saves hashing the tools on every call.
+    """
+    key = version or hashlib.sha256(dump_json(list(tools), sort_keys=True)).hexdigest()
+
+    with _lock:
+        toolset = _toolsets.get(key)
+        if toolset is not None:
+            _toolsets.move_to_end(key)
+            return toolset
+
+    toolset = CompiledToolset(tools)
+
+    with _lock:
+        _toolsets[key] = toolset
+        while len(_toolsets) > TOOLSET_CACHE_SIZE:
+            _toolsets.popitem(last=False)
+
+    return toolset
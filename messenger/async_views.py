@@ -0,0 +1,158 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from messenger.models import Conversation
+from messenger.views import MessagingView
+from neon.backends import AutheticationBackend
+from neon.utils.parsing_tools import parse_json
+from neon.utils.sse_tools import flush_ticks
+from messenger.services.change_feed import changes_since, has_changes, long_poll
+from messenger.services.chat_turn import ChatTurn
+import logging
+
+logger = logging.getLogger(__name__)
+
+authentication_backend = AutheticationBackend()
+
+messaging_view = MessagingView.as_view()
+
+FORM_CONTENT_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
+
+
+async def authenticate(request):
+    """
+    Returns (user, None), or (None, 401 response) when the request carries no
+    valid credentials.
+    """
+    authenticated = await sync_to_async(authentication_backend.authenticate)(request)
+    if authenticated is None:
+        return None, JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=401,
+            headers={"WWW-Authenticate": authentication_backend.authenticate_header(request)},
+        )
+    return authenticated[0], None
+
+
+def request_data(request):
+    """
+    Parses the bodies MessagingView.post accepts: JSON, form or multipart data.
+    """
+    if request.content_type in FORM_CONTENT_TYPES:
+        return request.POST
+    return parse_json(request.body or b"{}")
+
+
+@csrf_exempt
+async def conversation(request, conversation_id):
+    """
+    Routes api/messenger/<conversation_id>/. Under ASGI a sync view's streaming
+    response is buffered whole before it is sent, so chat POSTs go to
+    stream_chat there. Under WSGI, and for every other method, MessagingView
+    handles the request.
+    """
+    if request.method == "POST" and isinstance(request, ASGIRequest):
+        return await stream_chat(request, conversation_id)
+    return await sync_to_async(messaging_view)(request, conversation_id=conversation_id)
+
+
+@csrf_exempt
+@require_POST
+async def stream_chat(request, conversation_id):
+    """
+    Async version of MessagingView.post, served through neon/asgi.py. Both
+    share ChatTurn and only differ in the token loop.
+
+    DRF views are sync only, so authentication is done here with the same
+    backend. The LLM stream runs on the provider's async client and never holds
+    a worker thread while waiting for tokens, blocking work (Redis, the
+    persistence transaction) runs in threads through sync_to_async.
+    """
+    user, error = await authenticate(request)
+    if error is not None:
+        return error
+
+    try:
+        turn = await sync_to_async(ChatTurn.prepare)(
+            conversation_id, user, request_data(request)
+        )
+    except Exception as ex:
+        return JsonResponse(str(ex), safe=False, status=500)
+
+    async def replay_response():
+        for frame in turn.replay():
+            yield frame
+        await sync_to_async(turn.replayed)()
+
+    async def stream_response():
+        while True:
+            attempt = turn.attempt()
+            try:
+                tokens = turn.llm_service.astream_chat_completion(
+                    *turn.completion_args()
+                )
+                if attempt.coalescer is not None:
+                    tokens = flush_ticks(tokens, attempt.coalescer)
+                async for token in tokens:
+                    for frame in attempt.push(token):
+                        yield frame
+                for frame in attempt.flush():
+                    yield frame
+
+                await sync_to_async(turn.complete)(attempt.reply())
+                # Exit if successful
+                return
+
+            except Exception as ex:
+                frames, retry = await sync_to_async(turn.failed)(attempt, ex)
+                for frame in frames:
+                    yield frame
+                if not retry:
+                    return
+
+    return StreamingHttpResponse(
+        stream_response() if turn.cached_reply is None else replay_response(),
+        content_type="text/event-stream",
+        headers=turn.headers(),
+    )
+
+
+@require_GET
+async def sync_changes(request, conversation_id):
+    """
+    Delta sync for polling clients: messages inserted or soft-deleted and
+    conversation metadata changed since the "cursor" query parameter, see
+    change_feed.changes_since. With "wait" (seconds, capped at
+    MESSENGER_SYNC_MAX_WAIT) the request is held until something changes.
+    Only the conversation's creator can sync it, anyone else gets a 404.
+    """
+    user, error = await authenticate(request)
+    if error is not None:
+        return error
+
+    cursor = request.GET.get("cursor")
+    try:
+        wait = min(float(request.GET.get("wait", 0)), settings.MESSENGER_SYNC_MAX_WAIT)
+    except ValueError:
+        wait = 0
+
+    async def load():
+        return await sync_to_async(changes_since)(conversation_id, user.pk, cursor)
+
+    try:
+        changes = await load()
+        if cursor and wait > 0 and not has_changes(changes):
+            try:
+                changes = await long_poll(conversation_id, wait, load)
+            except Exception as ex:
+                # Answer right away rather than failing the poll
+                logger.warning("Long-poll unavailable: %s", ex)
+    except Conversation.DoesNotExist:
+        return JsonResponse({"detail": "Conversation not found."}, status=404)
+    except Exception as ex:
+        return JsonResponse(str(ex), safe=False, status=500)
+
+    return JsonResponse(changes, headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from llm.utils.embeddings import get_embedder
+from messenger.models import Conversation, Message
+from messenger.services.memory_index import memory_index
+
+
+class Command(BaseCommand):
+    help = "Embeds messages saved before retrieval memory was enabled"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Messages embedded per INSERT",
+        )
+        parser.add_argument(
+            "--preload",
+            action="store_true",
+            help="Also sync every scope's memory-mapped index files, so the "
+            "first recall of a scope doesn't load it on the request path",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        conversations = Conversation.objects.select_related("organization").filter(
+            message__messageembedding__isnull=True
+        ).distinct()
+
+        for conversation in conversations.iterator():
+            messages = Message.objects.filter(
+                conversation=conversation, messageembedding__isnull=True
+            ).only("message_id", "content").order_by("created_at")
+
+            indexed = 0
+            batch = []
+            for message in messages.iterator(chunk_size=batch_size):
+                batch.append(message)
+                if len(batch) >= batch_size:
+                    memory_index.add(conversation, batch)
+                    indexed += len(batch)
+                    batch = []
+            if batch:
+                memory_index.add(conversation, batch)
+                indexed += len(batch)
+
+            self.stdout.write(
+                f"Indexed {indexed} messages of conversation {conversation.conversation_id}"
+            )
+
+        if options["preload"]:
+            self.preload()
+
+    def preload(self):
+        conversations = Conversation.objects.select_related("organization").filter(
+            messageembedding__isnull=False
+        ).distinct()
+
+        for conversation in conversations.iterator():
+            embedder = get_embedder(conversation.organization.llm_api_key)
+            index = memory_index.load(conversation, conversation.created_by_id, embedder)
+            self.stdout.write(
+                f"Preloaded {index.size} vectors for conversation {conversation.conversation_id}"
+            )
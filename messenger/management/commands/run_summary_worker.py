@@ -0,0 +1,50 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from messenger.services.summary_service import process_summary_job, summary_queue
+
+
+class Command(BaseCommand):
+    help = "Processes queued conversation summarization jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=5,
+            help="Seconds to block waiting for a job before polling again",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is drained",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Summary worker started")
+
+        while True:
+            try:
+                payload = summary_queue.dequeue(timeout=options["timeout"])
+            except Exception as ex:
+                self.stderr.write(f"Failed to read summary queue: {ex}")
+                time.sleep(options["timeout"])
+                continue
+
+            if payload is None:
+                if options["once"]:
+                    return
+                continue
+
+            close_old_connections()
+            try:
+                process_summary_job(payload)
+                self.stdout.write(
+                    f"Summarized conversation {payload['conversation_id']}"
+                )
+            except Exception as ex:
+                self.stderr.write(
+                    f"Failed to summarize conversation {payload['conversation_id']}: {ex}"
+                )
+            finally:
+                close_old_connections()
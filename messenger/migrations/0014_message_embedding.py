@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messenger', '0013_message_token_count'),
+        ('organization', '0002_organization_llm_api_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageEmbedding',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('embedder', models.CharField(max_length=100)),
+                ('vector', models.BinaryField()),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to='messenger.conversation')),
+                ('message', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='messenger.message')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to='organization.organization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['conversation', 'embedder', 'id'], name='messenger_m_convers_82de35_idx'), models.Index(fields=['organization', 'embedder', 'id'], name='messenger_m_organiz_42b54a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messenger', '0015_message_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['created_by', 'created_at', 'conversation_id'], name='conversation_creator_created'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created_at', 'message_id'], name='message_conversation_created'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+NUMBER_MESSAGES = """
+UPDATE messenger_message AS m
+SET seq = numbered.seq
+FROM (
+    SELECT
+        message_id,
+        row_number() OVER (
+            PARTITION BY conversation_id ORDER BY created_at, message_id
+        ) AS seq
+    FROM messenger_message
+) AS numbered
+WHERE m.message_id = numbered.message_id;
+
+UPDATE messenger_conversation AS c
+SET last_seq = counts.last_seq
+FROM (
+    SELECT conversation_id, max(seq) AS last_seq
+    FROM messenger_message
+    GROUP BY conversation_id
+) AS counts
+WHERE c.conversation_id = counts.conversation_id;
+"""
+
+# Seeners and receivers rows become watermarks at the newest message each
+# account saw or received
+COPY_RECEIPTS = """
+INSERT INTO messenger_conversationreadstate
+    (account_id, conversation_id, last_seen_seq, last_delivered_seq, updated_at)
+SELECT
+    receipts.account_id,
+    m.conversation_id,
+    max(CASE WHEN receipts.seen THEN m.seq ELSE 0 END),
+    max(m.seq),
+    now()
+FROM (
+    SELECT message_id, account_id, true AS seen FROM messenger_message_seeners
+    UNION ALL
+    SELECT message_id, account_id, false AS seen FROM messenger_message_receivers
+) AS receipts
+JOIN messenger_message AS m ON m.message_id = receipts.message_id
+GROUP BY receipts.account_id, m.conversation_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messenger', '0016_hot_query_indexes'),
+        ('user', '0039_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ConversationReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_seen_seq', models.PositiveBigIntegerField(default=0)),
+                ('last_delivered_seq', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to='user.account')),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to='messenger.conversation')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('account', 'conversation'), name='conversation_read_state_unique')],
+            },
+        ),
+        migrations.RunSQL(NUMBER_MESSAGES, migrations.RunSQL.noop),
+        migrations.RunSQL(COPY_RECEIPTS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messenger', '0017_conversation_read_state'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'seq'], name='message_conversation_seq'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['conversation', 'deleted_at'], name='message_conversation_deleted'),
+        ),
+    ]
@@ -1,7 +1,10 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 from user.models import Account
 from llm.models import Agent
 from organization.models import Organization
+from llm.utils.token_counting import estimate_tokens
 import uuid
 
 
@@ -22,6 +25,22 @@ class Conversation(models.Model):
     )
     created_by = models.ForeignKey(Account, null=False, on_delete=models.DO_NOTHING)
     created_at = models.DateTimeField(auto_now=True)
+    # Seq of the newest message, bumped by persist_exchange
+    last_seq = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["name"],
+                name="conversation_name_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+            # Conversation list, newest first per creator
+            models.Index(
+                fields=["created_by", "created_at", "conversation_id"],
+                name="conversation_creator_created",
+            ),
+        ]
 
 
 class Message(models.Model):
@@ -43,6 +62,9 @@ class Message(models.Model):
     agent = models.ForeignKey(Agent, on_delete=models.DO_NOTHING, null=True, blank=True)
     message_type = models.CharField(choices=MESSAGE_TYPE_CHOICES, null=False)
     content = models.TextField(null=False)
+    token_count = models.PositiveIntegerField(default=0)
+    # 1-based position in the conversation, compared with read watermarks
+    seq = models.PositiveBigIntegerField(default=0)
     created_at = models.DateTimeField(auto_now=True)
     replying_to = models.ForeignKey(
         "self", on_delete=models.DO_NOTHING, null=True, blank=True
@@ -66,6 +88,37 @@ class Message(models.Model):
     seeners = models.ManyToManyField(
         Account, related_name="conversation_seeners", blank=True
     )
+    # Maintained by Postgres, used by the search endpoint
+    search_vector = models.GeneratedField(
+        expression=SearchVector("content", config="english"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="message_search_vector_gin"),
+            # Message pages and history, ordered by time within a conversation
+            models.Index(
+                fields=["conversation", "created_at", "message_id"],
+                name="message_conversation_created",
+            ),
+            # Delta sync: inserts after a seq and soft deletes after a time
+            models.Index(
+                fields=["conversation", "seq"],
+                name="message_conversation_seq",
+            ),
+            models.Index(
+                fields=["conversation", "deleted_at"],
+                name="message_conversation_deleted",
+                condition=models.Q(deleted_at__isnull=False),
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.token_count:
+            self.token_count = estimate_tokens(self.content)
+        super().save(*args, **kwargs)
 
 
 class Summary(models.Model):
@@ -75,3 +128,45 @@ class Summary(models.Model):
     conversation = models.ForeignKey(Conversation, on_delete=models.DO_NOTHING)
     context = models.TextField(null=False)
     range = models.IntegerField()
+
+
+class ConversationReadState(models.Model):
+    """
+    How far an account has received and read a conversation. Replaces the
+    per-message receivers/seeners rows: unread messages are the ones with a
+    seq above last_seen_seq.
+    """
+
+    account = models.ForeignKey(Account, on_delete=models.DO_NOTHING)
+    conversation = models.ForeignKey(Conversation, on_delete=models.DO_NOTHING)
+    last_seen_seq = models.PositiveBigIntegerField(default=0)
+    last_delivered_seq = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "conversation"],
+                name="conversation_read_state_unique",
+            ),
+        ]
+
+
+class MessageEmbedding(models.Model):
+    """
+    Vector of a message for retrieval memory, see services/memory_index.py.
+    Vectors are float32 arrays stored as raw bytes.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    message = models.OneToOneField(Message, on_delete=models.CASCADE)
+    conversation = models.ForeignKey(Conversation, on_delete=models.DO_NOTHING)
+    organization = models.ForeignKey(Organization, on_delete=models.DO_NOTHING)
+    embedder = models.CharField(max_length=100)
+    vector = models.BinaryField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["conversation", "embedder", "id"]),
+            models.Index(fields=["organization", "embedder", "id"]),
+        ]
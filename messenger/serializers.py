@@ -1,8 +1,24 @@
 from rest_framework import serializers
 from .models import Conversation, Message
 
+# Columns read for message pages, see serialize_message_page
+MESSAGE_PAGE_FIELDS = (
+    "message_id",
+    "conversation_id",
+    "sender_id",
+    "agent_id",
+    "message_type",
+    "content",
+    "created_at",
+    "replying_to_id",
+    "deleted_at",
+    "seq",
+)
+
 
 class ConversationSerializer(serializers.ModelSerializer):
+    # Annotated by MessagingListView
+    unread_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Conversation
@@ -13,4 +29,36 @@ class MessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Message
-        fields = "__all__"
+        exclude = ["search_vector"]
+
+
+def iso_datetime(value):
+    # Same format as DRF's DateTimeField
+    if value is None:
+        return None
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def serialize_message_page(rows):
+    """
+    Serializes MESSAGE_PAGE_FIELDS rows of a message page. Read receipts are
+    per conversation (see ConversationReadState), so a page is one query.
+    """
+    return [
+        {
+            "message_id": row["message_id"],
+            "conversation": row["conversation_id"],
+            "sender": row["sender_id"],
+            "agent": row["agent_id"],
+            "message_type": row["message_type"],
+            "content": row["content"],
+            "created_at": iso_datetime(row["created_at"]),
+            "replying_to": row["replying_to_id"],
+            "deleted_at": iso_datetime(row["deleted_at"]),
+            "seq": row["seq"],
+        }
+        for row in rows
+    ]
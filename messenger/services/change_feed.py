@@ -0,0 +1,270 @@
+from django.conf import settings
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+from django_redis import get_redis_connection
+from messenger.models import Conversation, Message
+from messenger.serializers import (
+    MESSAGE_PAGE_FIELDS,
+    iso_datetime,
+    serialize_message_page,
+)
+from neon.utils.pagination_tools import decode_cursor, encode_cursor
+import asyncio
+import logging
+import redis.asyncio
+import weakref
+
+logger = logging.getLogger(__name__)
+
+
+def channel(conversation_id):
+    return f"messenger:changes:{conversation_id}"
+
+
+def publish_change(conversation_id):
+    """
+    Wakes up clients long-polling the conversation. Failing to publish only
+    delays them until their wait times out, so errors are logged and swallowed.
+    """
+    try:
+        get_redis_connection("default").publish(channel(conversation_id), "1")
+    except Exception as ex:
+        logger.warning("Failed to publish conversation change: %s", ex)
+
+
+def current_cursor(conversation):
+    """
+    The cursor of a client that is up to date: the newest seq, the newest
+    soft delete so that earlier ones aren't sent as changes, and the
+    conversation's last modification time.
+    """
+    deleted_at = Message.objects.filter(
+        conversation_id=conversation.conversation_id, deleted_at__isnull=False
+    ).aggregate(last=Max("deleted_at"))["last"]
+    return encode_cursor(
+        [
+            conversation.last_seq,
+            iso_datetime(deleted_at) if deleted_at else None,
+            iso_datetime(conversation.created_at),
+        ]
+    )
+
+
+def parse_sync_cursor(cursor):
+    """
+    Returns the (seq, deleted_at, modified_at) of a cursor, or None when it is
+    missing or malformed, which is answered like a missing cursor.
+    """
+    values = decode_cursor(cursor, size=3)
+    if values is None:
+        return None
+    seq, deleted_at, modified_at = values
+    if not isinstance(seq, int) or isinstance(seq, bool) or seq < 0:
+        return None
+    if not isinstance(modified_at, str):
+        return None
+    if deleted_at is not None:
+        try:
+            if parse_datetime(deleted_at) is None:
+                return None
+        except (TypeError, ValueError):
+            return None
+    return values
+
+
+def inserted_queryset(conversation_id, seq):
+    """
+    Messages after seq, one more than MESSENGER_SYNC_PAGE_SIZE to tell if
+    there are more.
+    """
+    return (
+        Message.objects.filter(conversation_id=conversation_id, seq__gt=seq)
+        .order_by("seq")
+        .values(*MESSAGE_PAGE_FIELDS)[: settings.MESSENGER_SYNC_PAGE_SIZE + 1]
+    )
+
+
+def deleted_queryset(conversation_id, seq, deleted_at):
+    """
+    Messages up to seq soft-deleted after deleted_at.
+    """
+    messages = Message.objects.filter(
+        conversation_id=conversation_id, seq__lte=seq, deleted_at__isnull=False
+    )
+    if deleted_at:
+        messages = messages.filter(deleted_at__gt=deleted_at)
+    return messages.order_by("deleted_at").values("message_id", "deleted_at")
+
+
+def changes_since(conversation_id, account_id, cursor):
+    """
+    Changes of a conversation created by account_id after a cursor from a
+    previous call. Raises Conversation.DoesNotExist for anyone else's.
+
+    The cursor holds the last message seq sent to the client, the newest
+    deleted_at it has seen and the conversation's last modification time
+    (Conversation.created_at is auto_now). Without a cursor nothing is
+    returned, only the cursor to start syncing from.
+
+    Returns:
+        dict: messages inserted after the cursor (deleted ones included, with
+        their deleted_at), deleted: earlier messages soft-deleted since,
+        conversation: its metadata when it changed, has_more when inserts were
+        capped at MESSENGER_SYNC_PAGE_SIZE, and the new cursor.
+    """
+    conversation = Conversation.objects.only("name", "created_at", "last_seq").get(
+        conversation_id=conversation_id, created_by_id=account_id
+    )
+    values = parse_sync_cursor(cursor)
+    if values is None:
+        return {
+            "messages": [],
+            "deleted": [],
+            "conversation": None,
+            "has_more": False,
+            "cursor": current_cursor(conversation),
+        }
+
+    seq, deleted_at, modified_at = values
+
+    inserted = list(inserted_queryset(conversation_id, seq))
+    has_more = len(inserted) > settings.MESSENGER_SYNC_PAGE_SIZE
+    inserted = inserted[: settings.MESSENGER_SYNC_PAGE_SIZE]
+
+    deleted = list(deleted_queryset(conversation_id, seq, deleted_at))
+
+    metadata = None
+    if iso_datetime(conversation.created_at) != modified_at:
+        metadata = {
+            "conversation_id": conversation.conversation_id,
+            "name": conversation.name,
+            "last_seq": conversation.last_seq,
+            "modified_at": iso_datetime(conversation.created_at),
+        }
+
+    if inserted:
+        seq = inserted[-1]["seq"]
+    if deleted:
+        deleted_at = iso_datetime(deleted[-1]["deleted_at"])
+
+    return {
+        "messages": serialize_message_page(inserted),
+        "deleted": [
+            {
+                "message_id": row["message_id"],
+                "deleted_at": iso_datetime(row["deleted_at"]),
+            }
+            for row in deleted
+        ],
+        "conversation": metadata,
+        "has_more": has_more,
+        "cursor": encode_cursor(
+            [seq, deleted_at, iso_datetime(conversation.created_at)]
+        ),
+    }
+
+
+def has_changes(changes):
+    return bool(changes["messages"] or changes["deleted"] or changes["conversation"])
+
+
+class ChangeListener:
+    """
+    A single Redis subscription per event loop, shared by every long-poll
+    running on it. Waiters register an asyncio.Event per conversation, the
+    channel is subscribed while it has waiters, and one reader task sets the
+    events of each published change. Idle pollers cost an Event, not a Redis
+    connection each.
+    """
+
+    def __init__(self):
+        self.client = redis.asyncio.from_url(settings.CACHES["default"]["LOCATION"])
+        self.pubsub = self.client.pubsub()
+        self.waiters = {}
+        self.lock = asyncio.Lock()
+        self.reader = None
+
+    async def subscribe(self, conversation_id):
+        name = channel(conversation_id)
+        event = asyncio.Event()
+        async with self.lock:
+            waiters = self.waiters.setdefault(name, set())
+            if not waiters:
+                await self.pubsub.subscribe(name)
+            waiters.add(event)
+            if self.reader is None or self.reader.done():
+                self.reader = asyncio.ensure_future(self.read())
+        return event
+
+    async def unsubscribe(self, conversation_id, event):
+        name = channel(conversation_id)
+        async with self.lock:
+            waiters = self.waiters.get(name)
+            if waiters is None:
+                return
+            waiters.discard(event)
+            if not waiters:
+                del self.waiters[name]
+                await self.pubsub.unsubscribe(name)
+
+    async def read(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                logger.warning("Change listener failed: %s", ex)
+                # Waiters reload instead of sleeping through a reconnect
+                for waiters in list(self.waiters.values()):
+                    for event in waiters:
+                        event.set()
+                await asyncio.sleep(1)
+                continue
+
+            if message is None:
+                continue
+            name = message["channel"].decode("utf-8")
+            for event in self.waiters.get(name, ()):
+                event.set()
+
+
+listeners = weakref.WeakKeyDictionary()
+
+
+def get_listener():
+    loop = asyncio.get_running_loop()
+    listener = listeners.get(loop)
+    if listener is None:
+        listener = listeners[loop] = ChangeListener()
+    return listener
+
+
+async def long_poll(conversation_id, timeout, load):
+    """
+    Returns the awaited load() as soon as it has changes, waiting up to timeout
+    seconds for a publish_change of the conversation otherwise. While idle the
+    client holds no worker thread, database or Redis connection, only a waiter
+    on the shared ChangeListener. load runs once subscribed so a change made in
+    between is not missed.
+    """
+    listener = get_listener()
+    event = await listener.subscribe(conversation_id)
+    try:
+        changes = await load()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not has_changes(changes) and (remaining := deadline - loop.time()) > 0:
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+            event.clear()
+            changes = await load()
+
+        return changes
+    finally:
+        await listener.unsubscribe(conversation_id, event)
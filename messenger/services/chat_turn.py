@@ -0,0 +1,193 @@
+from llm.services.execution_plan import get_execution_plan
+from llm.services.llm_factory import LLMFactory
+from llm.utils.llm_response_parsing import handle_llm_response
+from llm.utils.tool_schemas import get_toolset
+from messenger.models import Conversation
+from messenger.services.context_builder import ContextBuilder
+from messenger.services.memory_index import memory_index
+from messenger.services.message_persistence import persist_exchange
+from messenger.services.response_cache import response_cache
+from messenger.services.summary_service import SummaryService
+from neon.utils.sse_tools import (
+    FLUSH_DUE,
+    FrameCoalescer,
+    event_frame,
+    replay_frames,
+    token_frame,
+    wants_coalescing,
+)
+
+MAX_ATTEMPTS = 3
+
+ERROR_MESSAGE = (
+    "Sorry, there is a problem processing your request. Please try again later."
+)
+
+
+class TurnAttempt:
+    """
+    One attempt at streaming the reply: frames the tokens as they arrive,
+    coalesced when the client opted in, and collects the reply.
+    """
+
+    def __init__(self, number, coalesce):
+        self.number = number
+        self.coalescer = FrameCoalescer() if coalesce else None
+        self.tokens = []
+
+    def push(self, token):
+        """
+        Returns:
+            list: Frames to send for a token, or for FLUSH_DUE from flush_ticks.
+        """
+        if token is FLUSH_DUE:
+            return self.flush()
+        if token is None:
+            return []
+
+        self.tokens.append(token)
+        if self.coalescer is None:
+            return [token_frame(token)]
+        frame = self.coalescer.push(token)
+        return [frame] if frame else []
+
+    def flush(self):
+        if self.coalescer is None:
+            return []
+        frame = self.coalescer.flush()
+        return [frame] if frame else []
+
+    def reply(self):
+        return "".join(self.tokens)
+
+
+class ChatTurn:
+    """
+    A user message and the agent's reply, shared by MessagingView.post and the
+    ASGI stream_chat. prepare() builds everything the LLM request needs, the
+    endpoints only differ in how they iterate the provider's tokens (sync or
+    async) through attempt(), and report the outcome with complete(),
+    replayed() or failed().
+
+    Blocking methods (prepare and the outcome ones) hit Postgres and Redis,
+    async callers run them through sync_to_async.
+    """
+
+    def __init__(self, conversation, user, data):
+        self.conversation = conversation
+        self.user = user
+        self.message_type = data.get("message_type")
+        self.content = data.get("content")
+        self.model_uuid = data.get("model_uuid")
+        self.coalesce = wants_coalescing(data.get("coalesce", False))
+        self.attempts = 0
+
+    @classmethod
+    def prepare(cls, conversation_id, user, data):
+        conversation = Conversation.objects.select_related("organization").get(
+            conversation_id=conversation_id
+        )
+        turn = cls(conversation, user, data)
+
+        # Agent, role, tools and model config, cached across requests
+        turn.plan = get_execution_plan(data.get("agent_uuid"), turn.model_uuid)
+        turn.toolset = get_toolset(turn.plan.tools, turn.plan.version)
+
+        turn.llm_service = LLMFactory().create(
+            service=turn.plan.service,
+            api_key=conversation.organization.llm_api_key,
+            model=turn.plan.model,
+        )
+
+        # Summaries are precomputed by the summary worker, only read them here
+        turn.summary_service = SummaryService(turn.llm_service)
+        context, _, turn.tail = turn.summary_service.read(conversation)
+        # Older messages relevant to this prompt plus the newest ones
+        recalled = memory_index.with_recall(
+            conversation, user.pk, turn.content, turn.tail
+        )
+
+        turn.history, turn.prompt_tokens = ContextBuilder(
+            context_limit=turn.plan.context_limit
+        ).build(
+            context,
+            recalled,
+            fixed_texts=(
+                turn.plan.system_prompt,
+                turn.toolset.prompt_fragment,
+                turn.content,
+            ),
+        )
+
+        # Opted-in agents replay the stored reply to an identical prompt
+        turn.cached_reply = response_cache.get(
+            turn.plan, conversation, turn.content, turn.history
+        )
+        return turn
+
+    def completion_args(self):
+        """
+        Arguments of the provider's stream_chat_completion and
+        astream_chat_completion.
+        """
+        return list(self.history), self.plan.system_prompt, self.content, self.toolset
+
+    def headers(self):
+        return {
+            "Cache-Control": "no-cache",
+            "X-Prompt-Tokens": str(self.prompt_tokens),
+            "X-Response-Cache": "MISS" if self.cached_reply is None else "HIT",
+        }
+
+    def replay(self):
+        """
+        Frames of the cached reply, see replayed().
+        """
+        return replay_frames(self.cached_reply, self.coalesce)
+
+    def attempt(self):
+        self.attempts += 1
+        return TurnAttempt(self.attempts, self.coalesce)
+
+    def save(self, reply_content):
+        persist_exchange(
+            self.conversation,
+            self.user,
+            self.plan.agent_id,
+            self.message_type,
+            self.content,
+            reply_content,
+        )
+        # The user message and the AI reply were just saved
+        self.summary_service.schedule(
+            self.conversation.conversation_id, self.model_uuid, len(self.tail) + 2
+        )
+
+    def complete(self, reply):
+        self.save(handle_llm_response(reply))
+        response_cache.set(
+            self.plan, self.conversation, self.content, reply, self.history
+        )
+
+    def replayed(self):
+        self.save(handle_llm_response(self.cached_reply))
+
+    def failed(self, attempt, ex):
+        """
+        Frames reporting a failed attempt, after what it had buffered. Once
+        the last attempt failed, the error message is saved as the reply and
+        sent as well.
+
+        Returns:
+            tuple: (frames, whether to retry)
+        """
+        frames = attempt.flush()
+        # Provide immediate feedback of failure to client
+        message = f"Attempt {attempt.number} failed: {str(ex)}"
+        frames.append(event_frame({"status": False, "message": message}))
+        if attempt.number < MAX_ATTEMPTS:
+            return frames, True
+
+        self.save(ERROR_MESSAGE)
+        frames.append(event_frame({"status": False, "token": ERROR_MESSAGE}))
+        return frames, False
@@ -0,0 +1,94 @@
+from django.conf import settings
+from llm.utils.token_counting import (
+    MESSAGE_OVERHEAD_TOKENS,
+    estimate_tokens,
+    truncate_to_tokens,
+)
+from messenger.services.summary_service import to_history_message
+
+# Below this many tokens a truncated message is more noise than context
+MIN_TRUNCATED_TOKENS = 32
+
+
+class ContextBuilder:
+    """
+    Builds the LLM history within a token budget.
+
+    The budget is the configured LLM_CONTEXT_TOKEN_BUDGET, capped by the model's
+    context limit minus the tokens reserved for the completion. The system
+    prompt, tool definitions and user message are always sent, then the summary,
+    then the tail of the conversation newest-first until the budget runs out.
+    The oldest message that does not fit is truncated, anything older is dropped.
+    """
+
+    def __init__(self, context_limit=None, budget=None, completion_reserve=None):
+        if budget is None:
+            budget = settings.LLM_CONTEXT_TOKEN_BUDGET
+        if completion_reserve is None:
+            completion_reserve = settings.LLM_COMPLETION_TOKEN_RESERVE
+        if context_limit:
+            budget = min(budget, context_limit - completion_reserve)
+        self.budget = max(budget, 0)
+
+    def build(self, summary, tail, fixed_texts=()):
+        """
+        Args:
+            summary (str): Stored conversation summary, may be empty.
+            tail (list): (role, content, token_count) rows after the
+                summary watermark, oldest first. A token_count of 0 means it
+                was not stored and is estimated here.
+            fixed_texts (iterable): Texts sent with every request regardless of
+                the history (system prompt, tool definitions, user message).
+
+        Returns:
+            tuple: (history messages, prompt token count).
+        """
+        prompt_tokens = sum(
+            estimate_tokens(text) + MESSAGE_OVERHEAD_TOKENS for text in fixed_texts
+        )
+        remaining = self.budget - prompt_tokens
+
+        summary_message = None
+        if summary:
+            summary_content = f"Summary so far: {summary}"
+            cost = estimate_tokens(summary_content) + MESSAGE_OVERHEAD_TOKENS
+            if cost > remaining:
+                summary_content = truncate_to_tokens(
+                    summary_content, remaining - MESSAGE_OVERHEAD_TOKENS
+                )
+                cost = estimate_tokens(summary_content) + MESSAGE_OVERHEAD_TOKENS
+            if summary_content:
+                summary_message = {"role": "system", "content": summary_content}
+                remaining -= cost
+                prompt_tokens += cost
+
+        history = []
+        for role, content, token_count in reversed(tail):
+            message = to_history_message(role, content)
+            cost = (
+                (token_count or estimate_tokens(content))
+                + estimate_tokens("History: ")
+                + MESSAGE_OVERHEAD_TOKENS
+            )
+
+            if cost > remaining:
+                available = remaining - MESSAGE_OVERHEAD_TOKENS
+                if available >= MIN_TRUNCATED_TOKENS:
+                    message["content"] = truncate_to_tokens(
+                        message["content"], available
+                    )
+                    history.append(message)
+                    prompt_tokens += (
+                        estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+                    )
+                break
+
+            history.append(message)
+            remaining -= cost
+            prompt_tokens += cost
+
+        history.reverse()
+        if summary_message:
+            history.insert(0, summary_message)
+
+        return history, prompt_tokens
@@ -0,0 +1,154 @@
+from django.conf import settings
+from django_redis import get_redis_connection
+from messenger.models import Message
+from neon.utils.parsing_tools import dump_json, parse_json
+
+# Appends only when the buffer exists (a miss is rebuilt from Postgres on the
+# next read) and the new entries directly follow the last cached seq. A gap or
+# an overlap drops the buffer instead. Appends to a missing buffer flag it, so
+# a rebuild that read Postgres before their commit doesn't cache its snapshot.
+APPEND_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('SET', KEYS[2], '1', 'EX', tonumber(ARGV[3]))
+    return 0
+end
+local last = cjson.decode(redis.call('LINDEX', KEYS[1], -1))
+local first = cjson.decode(ARGV[4])
+if first['s'] ~= last['s'] + 1 then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+for i = 4, #ARGV do
+    redis.call('RPUSH', KEYS[1], ARGV[i])
+end
+redis.call('LTRIM', KEYS[1], -tonumber(ARGV[1]), -1)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+return cjson.decode(ARGV[#ARGV])['s']
+"""
+
+# Stores a rebuilt buffer unless an append landed since the rebuild started.
+REBUILD_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+for i = 2, #ARGV do
+    redis.call('RPUSH', KEYS[1], ARGV[i])
+end
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[1]))
+return 1
+"""
+
+# Appends to a missing buffer flag it for this long, rebuilds take far less
+STALE_FLAG_TTL = 60
+
+
+def message_role(message_type):
+    return "user" if message_type == "text" else "assistant"
+
+
+class HistoryCache:
+    """
+    Write-through ring buffer of the last N turns of each conversation.
+
+    Entries are stored in a Redis list as compact JSON objects: role (r),
+    content (c), token count (t) and seq (s), the Message.seq of the row,
+    comparable with Summary.range.
+    """
+
+    def __init__(self, size=None, ttl=None, alias="default"):
+        self.size = size or settings.MESSENGER_HISTORY_CACHE_SIZE
+        self.ttl = ttl or settings.MESSENGER_HISTORY_CACHE_TTL
+        self.alias = alias
+
+    @property
+    def connection(self):
+        return get_redis_connection(self.alias)
+
+    def key(self, conversation_id):
+        return f"messenger:history:{conversation_id}"
+
+    def stale_key(self, conversation_id):
+        return f"messenger:history:{conversation_id}:stale"
+
+    def read(self, conversation_id, after_seq=0):
+        """
+        Returns:
+            list or None: (role, content, token_count) rows with seq greater
+            than after_seq, oldest first, or None when messages after after_seq
+            are older than the last N turns kept in the buffer.
+        """
+        entries = self.connection.lrange(self.key(conversation_id), 0, -1)
+
+        if entries:
+            entries = [parse_json(entry) for entry in entries]
+        else:
+            entries = self.rebuild(conversation_id)
+
+        if entries and entries[0]["s"] > after_seq + 1:
+            return None
+
+        return [
+            (entry["r"], entry["c"], entry["t"])
+            for entry in entries
+            if entry["s"] > after_seq
+        ]
+
+    def tail_queryset(self, conversation_id):
+        """
+        The last N messages of a conversation, newest first.
+        """
+        return (
+            Message.objects.filter(conversation_id=conversation_id)
+            .order_by("-seq")
+            .values_list("seq", "message_type", "content", "token_count")[: self.size]
+        )
+
+    def rebuild(self, conversation_id):
+        connection = self.connection
+        connection.delete(self.stale_key(conversation_id))
+
+        rows = list(self.tail_queryset(conversation_id))
+        rows.reverse()
+
+        entries = [
+            {"r": message_role(message_type), "c": content, "t": token_count, "s": seq}
+            for seq, message_type, content, token_count in rows
+        ]
+
+        if entries:
+            script = connection.register_script(REBUILD_SCRIPT)
+            script(
+                keys=[self.key(conversation_id), self.stale_key(conversation_id)],
+                args=[self.ttl] + [dump_json(entry) for entry in entries],
+            )
+
+        return entries
+
+    def append(self, conversation_id, messages):
+        """
+        Appends saved messages, given as Message instances in the order they
+        were written with consecutive seqs.
+        """
+        script = self.connection.register_script(APPEND_SCRIPT)
+        return script(
+            keys=[self.key(conversation_id), self.stale_key(conversation_id)],
+            args=[self.size, self.ttl, STALE_FLAG_TTL]
+            + [
+                dump_json(
+                    {
+                        "r": message_role(message.message_type),
+                        "c": message.content,
+                        "t": message.token_count,
+                        "s": message.seq,
+                    }
+                )
+                for message in messages
+            ],
+        )
+
+    def invalidate(self, conversation_id):
+        self.connection.delete(self.key(conversation_id))
+
+
+history_cache = HistoryCache()
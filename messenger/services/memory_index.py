@@ -0,0 +1,287 @@
+from collections import OrderedDict
+from django.conf import settings
+from llm.utils.embeddings import get_embedder
+from messenger.models import Message, MessageEmbedding
+from messenger.services.history_cache import message_role
+from pathlib import Path
+import fcntl
+import logging
+import numpy as np
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Bytes of a MessageEmbedding id in a scope's .ids file
+ID_SIZE = np.dtype(np.int64).itemsize
+
+
+class ScopeIndex:
+    """
+    Vectors of one scope in two append-only files under MEMORY_INDEX_DIR:
+    <name>.vectors holds float32 rows and <name>.ids the MessageEmbedding id of
+    each row. Searches read them through np.memmap, so vectors live in the OS
+    page cache, shared by every worker process on the host, instead of being
+    copied into each process's heap.
+    """
+
+    def __init__(self, path, window=None):
+        self.vectors_path = path.with_suffix(".vectors")
+        self.ids_path = path.with_suffix(".ids")
+        self.lock_path = path.with_suffix(".lock")
+        self.window = window or settings.MEMORY_INDEX_RESYNC_WINDOW
+        self.lock = threading.Lock()
+        self._mapped = (0, None, None)
+        self._max_id = (0, 0)
+
+    @property
+    def size(self):
+        try:
+            return os.path.getsize(self.ids_path) // ID_SIZE
+        except FileNotFoundError:
+            return 0
+
+    def indexed_ids(self, size):
+        if size == 0:
+            return np.empty(0, np.int64)
+        return np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(size,))
+
+    def max_id(self, ids):
+        # The files are append-only, only rows added since the last call are read
+        size, max_id = self._max_id
+        if len(ids) < size:
+            # The files were deleted to be rebuilt
+            size, max_id = 0, 0
+        if len(ids) > size:
+            max_id = max(max_id, int(ids[size:].max()))
+        self._max_id = (len(ids), max_id)
+        return max_id
+
+    def sync(self, fetch):
+        """
+        Appends the rows fetch(floor, known) returns: (id, vector bytes) pairs
+        with an id above floor, except the known ids already in the files.
+
+        Embedding ids are allocated before their INSERT commits, so under
+        concurrent writers (other workers, build_memory_index batches) a lower
+        id can become visible after a sync already moved past it. Rather than
+        only taking ids above the newest indexed one, every sync re-reads the
+        trailing MEMORY_INDEX_RESYNC_WINDOW ids and appends those that are
+        missing, in whatever order they commit. A row committing more than
+        window ids late is only indexed once the scope's files are deleted and
+        rebuilt. The file lock serializes writers across processes.
+        """
+        with self.lock, open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # Vectors are written first, so the ids file never counts a
+                # row whose vector is missing
+                size = self.size
+                ids = self.indexed_ids(size)
+                floor = max(self.max_id(ids) - self.window, 0)
+                rows = fetch(floor, ids[ids > floor].tolist())
+                if not rows:
+                    return
+                with open(self.vectors_path, "r+b" if size else "wb") as file:
+                    file.truncate(size * len(bytes(rows[0][1])))
+                    file.seek(0, os.SEEK_END)
+                    file.write(b"".join(bytes(vector) for _, vector in rows))
+                with open(self.ids_path, "ab") as file:
+                    file.write(
+                        np.array([row_id for row_id, _ in rows], np.int64).tobytes()
+                    )
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def mapped(self, dimensions):
+        size = self.size
+        if size != self._mapped[0]:
+            if size == 0:
+                self._mapped = (0, None, None)
+            else:
+                ids = np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(size,))
+                matrix = np.memmap(
+                    self.vectors_path,
+                    dtype=np.float32,
+                    mode="r",
+                    shape=(size, dimensions),
+                )
+                self._mapped = (size, ids, matrix)
+        return self._mapped
+
+    def search(self, query, k):
+        """
+        Returns (embedding id, score) pairs of the k most similar rows, best
+        first. Vectors are unit length so the dot product is the cosine
+        similarity.
+        """
+        size, ids, matrix = self.mapped(len(query))
+        if size == 0:
+            return []
+
+        scores = matrix @ query
+        k = min(k, size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+class MemoryIndex:
+    """
+    Long-term retrieval memory over past messages.
+
+    Messages are embedded when they are saved and stored in MessageEmbedding.
+    Each scope is mirrored into memory-mapped files (see ScopeIndex) that only
+    take rows missing from them near the newest indexed id, so a lookup is one
+    indexed query plus a matrix-vector product. build_memory_index --preload
+    fills the files ahead of traffic. Processes keep the MEMORY_INDEX_MAX_SCOPES most recently
+    used scopes mapped.
+
+    With MEMORY_SCOPE set to "organization" recall spans the conversations the
+    caller created in the organization, never other members' conversations.
+    """
+
+    def __init__(self, max_scopes=None, directory=None):
+        self.max_scopes = max_scopes or settings.MEMORY_INDEX_MAX_SCOPES
+        self.directory = Path(directory or settings.MEMORY_INDEX_DIR)
+        self._scopes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def scope(self, conversation, account_id):
+        """
+        Returns:
+            tuple: (scope name, MessageEmbedding filter)
+        """
+        if settings.MEMORY_SCOPE == "organization":
+            return (
+                f"organization-{conversation.organization_id}-account-{account_id}",
+                {
+                    "organization_id": conversation.organization_id,
+                    "conversation__created_by_id": account_id,
+                },
+            )
+        return (
+            f"conversation-{conversation.conversation_id}",
+            {"conversation_id": conversation.conversation_id},
+        )
+
+    def add(self, conversation, messages):
+        messages = [message for message in messages if message.content]
+        if not messages:
+            return
+
+        embedder = get_embedder(conversation.organization.llm_api_key)
+        vectors = embedder.embed([message.content for message in messages])
+
+        MessageEmbedding.objects.bulk_create(
+            [
+                MessageEmbedding(
+                    message_id=message.message_id,
+                    conversation_id=conversation.conversation_id,
+                    organization_id=conversation.organization_id,
+                    embedder=embedder.name,
+                    vector=vector.tobytes(),
+                )
+                for message, vector in zip(messages, vectors)
+            ],
+            ignore_conflicts=True,
+        )
+
+    def load(self, conversation, account_id, embedder):
+        name, filters = self.scope(conversation, account_id)
+        name = f"{name}-{embedder.name}"
+
+        with self._lock:
+            index = self._scopes.get(name)
+            if index is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                index = ScopeIndex(self.directory / name)
+                self._scopes[name] = index
+            self._scopes.move_to_end(name)
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+
+        def fetch(floor, known):
+            return list(
+                MessageEmbedding.objects.filter(
+                    **filters, embedder=embedder.name, id__gt=floor
+                )
+                .exclude(id__in=known)
+                .order_by("id")
+                .values_list("id", "vector")
+            )
+
+        index.sync(fetch)
+        return index
+
+    def recall(self, conversation, account_id, query, k=None, exclude=()):
+        """
+        Returns up to k (role, content, token_count) rows most relevant to the
+        query, oldest first, skipping deleted messages and rows whose content
+        is in exclude.
+        """
+        if not query:
+            return []
+        k = k or settings.MEMORY_TOP_K
+
+        embedder = get_embedder(conversation.organization.llm_api_key)
+        query_vector = embedder.embed([query])[0]
+        index = self.load(conversation, account_id, embedder)
+
+        # Ask for extra candidates since recent messages are filtered out
+        matches = [
+            embedding_id
+            for embedding_id, score in index.search(query_vector, k + len(exclude))
+            if score >= settings.MEMORY_MIN_SCORE
+        ]
+        if not matches:
+            return []
+
+        excluded = set(exclude)
+        rows = {
+            embedding_id: row
+            for embedding_id, *row in Message.objects.filter(
+                messageembedding__id__in=matches, deleted_at__isnull=True
+            ).values_list(
+                "messageembedding__id",
+                "created_at",
+                "message_type",
+                "content",
+                "token_count",
+            )
+            if row[2] not in excluded
+        }
+        best = [rows[embedding_id] for embedding_id in matches if embedding_id in rows][
+            :k
+        ]
+        best.sort(key=lambda row: row[0])
+
+        return [
+            (message_role(message_type), content, token_count)
+            for _, message_type, content, token_count in best
+        ]
+
+    def with_recall(self, conversation, account_id, query, tail):
+        """
+        Replaces the tail sent to the model with the MEMORY_RECENT_MESSAGES
+        newest rows plus the older messages most relevant to the query.
+        """
+        if not settings.MEMORY_RETRIEVAL_ENABLED:
+            return tail
+
+        recent = tail[-settings.MEMORY_RECENT_MESSAGES :]
+        try:
+            recalled = self.recall(
+                conversation,
+                account_id,
+                query,
+                exclude=[content for _, content, _ in recent],
+            )
+        except Exception as ex:
+            logger.warning("Memory recall failed: %s", ex)
+            return tail
+
+        return recalled + recent
+
+
+memory_index = MemoryIndex()
@@ -0,0 +1,86 @@
+from django.db import transaction
+from llm.utils.token_counting import estimate_tokens
+from neon.conditional import resource_versions
+from messenger.models import Message
+from messenger.services.change_feed import publish_change
+from messenger.services.history_cache import history_cache
+from messenger.services.memory_index import memory_index
+from messenger.services.read_state import advance, allocate_seqs
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def persist_exchange(
+    conversation, user, agent_id, message_type, content, reply_content
+):
+    """
+    Saves a user message and the agent's reply in a single transaction, with
+    the next seqs of the conversation. The sender's read watermark is moved to
+    the reply instead of writing per-message receivers/seeners rows.
+
+    The history cache and the memory index are updated once the transaction
+    commits.
+
+    Returns:
+        tuple: (user message, AI reply)
+    """
+    new_message = Message(
+        conversation=conversation,
+        sender=user,
+        agent=None,
+        message_type=message_type,
+        content=content,
+        token_count=estimate_tokens(content),
+    )
+    ai_reply = Message(
+        conversation=conversation,
+        sender=None,
+        agent_id=agent_id,
+        message_type="ai_reply",
+        content=reply_content,
+        token_count=estimate_tokens(reply_content),
+    )
+    messages = [new_message, ai_reply]
+
+    with transaction.atomic():
+        first_seq = allocate_seqs(conversation.conversation_id, len(messages))
+        for offset, message in enumerate(messages):
+            message.seq = first_seq + offset
+
+        Message.objects.bulk_create(messages)
+
+        advance(
+            user.pk,
+            conversation.conversation_id,
+            seen_seq=ai_reply.seq,
+            delivered_seq=ai_reply.seq,
+        )
+
+        transaction.on_commit(
+            lambda: cache_messages(conversation.conversation_id, messages)
+        )
+        transaction.on_commit(lambda: index_messages(conversation, messages))
+        transaction.on_commit(lambda: publish_change(conversation.conversation_id))
+        transaction.on_commit(
+            lambda: resource_versions.bump(
+                f"conversation:{conversation.conversation_id}",
+                f"conversations:{conversation.created_by_id}",
+            )
+        )
+
+    return new_message, ai_reply
+
+
+def cache_messages(conversation_id, messages):
+    try:
+        history_cache.append(conversation_id, messages)
+    except Exception as ex:
+        logger.warning("Failed to update history cache: %s", ex)
+
+
+def index_messages(conversation, messages):
+    try:
+        memory_index.add(conversation, messages)
+    except Exception as ex:
+        logger.warning("Failed to index messages: %s", ex)
@@ -0,0 +1,61 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from messenger.models import Conversation, ConversationReadState
+from neon.conditional import resource_versions
+
+
+def allocate_seqs(conversation_id, count):
+    """
+    Reserves the next count message seqs of a conversation. Must run inside
+    the transaction that saves the messages: the UPDATE locks the conversation
+    row until commit, so concurrent writers get consecutive ranges.
+
+    Returns:
+        int: The first reserved seq.
+    """
+    Conversation.objects.filter(conversation_id=conversation_id).update(
+        last_seq=F("last_seq") + count
+    )
+    last_seq = Conversation.objects.values_list("last_seq", flat=True).get(
+        conversation_id=conversation_id
+    )
+    return last_seq - count + 1
+
+
+def read_state_queryset(account_id, conversation_id):
+    return ConversationReadState.objects.filter(
+        account_id=account_id, conversation_id=conversation_id
+    )
+
+
+def advance(account_id, conversation_id, seen_seq=0, delivered_seq=0):
+    """
+    Moves an account's watermarks forward, never backwards. A single UPDATE
+    whatever the number of messages it covers, plus an INSERT the first time.
+    Seeing a message implies it was delivered.
+    """
+    delivered_seq = max(delivered_seq, seen_seq)
+    updated = read_state_queryset(account_id, conversation_id).update(
+        last_seen_seq=Greatest(F("last_seen_seq"), seen_seq),
+        last_delivered_seq=Greatest(F("last_delivered_seq"), delivered_seq),
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                ConversationReadState.objects.create(
+                    account_id=account_id,
+                    conversation_id=conversation_id,
+                    last_seen_seq=seen_seq,
+                    last_delivered_seq=delivered_seq,
+                )
+        except IntegrityError:
+            # Created concurrently, update it instead
+            return advance(account_id, conversation_id, seen_seq, delivered_seq)
+
+    # Unread counts in the account's conversation list change. Registered
+    # after the write: in autocommit the callback runs right away, and a GET
+    # made in between must not cache the old count under the new version
+    transaction.on_commit(
+        lambda: resource_versions.bump(f"conversations:{account_id}")
+    )
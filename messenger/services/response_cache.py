@@ -0,0 +1,107 @@
+from django.conf import settings
+from django_redis import get_redis_connection
+from neon.utils.parsing_tools import dump_json
+import hashlib
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    return WHITESPACE.sub(" ", (prompt or "").strip()).lower()
+
+
+class ResponseCache:
+    """
+    Exact-match cache of agent replies for FAQ-style agents, opted into with
+    Agent.response_cache_ttl.
+
+    Replies are keyed by the execution plan version, the model, the
+    conversation's organization, the normalized user prompt and, with
+    Agent.response_cache_include_context, a hash of the history sent to the
+    model. Each agent keeps at most RESPONSE_CACHE_MAX_ENTRIES_PER_AGENT
+    replies in Redis, the least recently used are evicted first. Agents with
+    POST tools are never cached since their replies have side effects.
+
+    Without include_context only turns that depend on nothing but the prompt
+    are cached: no history (summary or earlier messages) and no tools, whose
+    results may be specific to the caller.
+    """
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    @property
+    def connection(self):
+        return get_redis_connection(self.alias)
+
+    def is_enabled(self, plan, history=None):
+        if plan.response_cache_ttl <= 0 or plan.has_side_effects:
+            return False
+        if plan.response_cache_include_context:
+            return True
+        return not history and not plan.tools
+
+    def index_key(self, plan):
+        return f"response-cache:{plan.agent_uuid}:index"
+
+    def key(self, plan, conversation, prompt, history=None):
+        parts = [
+            plan.version,
+            plan.model,
+            str(conversation.organization_id),
+            normalize_prompt(prompt),
+        ]
+        if plan.response_cache_include_context:
+            parts.append(hashlib.sha256(dump_json(history or [])).hexdigest())
+        digest = hashlib.sha256(dump_json(parts)).hexdigest()
+        return f"response-cache:{plan.agent_uuid}:{digest}"
+
+    def get(self, plan, conversation, prompt, history=None):
+        if not self.is_enabled(plan, history):
+            return None
+
+        key = self.key(plan, conversation, prompt, history)
+        try:
+            connection = self.connection
+            reply = connection.get(key)
+            if reply is None:
+                return None
+            connection.zadd(self.index_key(plan), {key: time.time()})
+            return reply.decode("utf-8")
+        except Exception as ex:
+            logger.warning("Response cache unavailable: %s", ex)
+            return None
+
+    def set(self, plan, conversation, prompt, reply, history=None):
+        if not self.is_enabled(plan, history) or not reply:
+            return False
+
+        key = self.key(plan, conversation, prompt, history)
+        index_key = self.index_key(plan)
+        try:
+            connection = self.connection
+            pipeline = connection.pipeline()
+            pipeline.set(key, reply, ex=plan.response_cache_ttl)
+            pipeline.zadd(index_key, {key: time.time()})
+            pipeline.expire(index_key, plan.response_cache_ttl)
+            pipeline.zcard(index_key)
+            size = pipeline.execute()[-1]
+
+            overflow = size - settings.RESPONSE_CACHE_MAX_ENTRIES_PER_AGENT
+            if overflow > 0:
+                evicted = [
+                    member for member, _ in connection.zpopmin(index_key, overflow)
+                ]
+                connection.delete(*evicted)
+            return True
+        except Exception as ex:
+            logger.warning("Response cache unavailable: %s", ex)
+            return False
+
+
+response_cache = ResponseCache()
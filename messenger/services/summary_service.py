@@ -0,0 +1,158 @@
+from messenger.models import Conversation, Message, Summary
+from llm.models import Model
+from llm.services.llm_factory import LLMFactory
+from messenger.services.history_cache import history_cache, message_role
+from neon.utils.job_queue import JobQueue
+import logging
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 20
+
+summary_queue = JobQueue("summaries")
+
+
+def to_history_message(role, content):
+    return {"role": role, "content": f"History: {content}"}
+
+
+class SummaryService:
+    """
+    Rolling conversation summarizer.
+
+    The stored Summary.context is treated as the running state and Summary.range
+    as the watermark (number of messages already folded into it). Only complete
+    batches after the watermark are summarized, so the cost of a turn is bounded
+    by the new messages instead of the conversation's age.
+    """
+
+    def __init__(self, llm_service, batch_size=BATCH_SIZE):
+        self.llm_service = llm_service
+        self.batch_size = batch_size
+
+    def read(self, conversation):
+        """
+        Reads the stored summary and the messages after its watermark without
+        calling the LLM. The messages come from the history cache, falling back
+        to Postgres when Redis is unavailable.
+
+        Returns:
+            tuple: (summary context, watermark, list of (role, content,
+            token_count) rows after the watermark that are not part of the
+            summary yet).
+        """
+        context, watermark = self.load_summary(conversation)
+
+        try:
+            pending = history_cache.read(
+                conversation.conversation_id, after_seq=watermark
+            )
+        except Exception as ex:
+            logger.warning("History cache unavailable: %s", ex)
+            pending = None
+
+        if pending is None:
+            # Redis is down, or the summary is behind the buffered turns
+            pending = self.load_pending(conversation, watermark)
+
+        return context, watermark, pending
+
+    def load_summary(self, conversation):
+        summary = Summary.objects.filter(conversation=conversation).first()
+        if summary is None:
+            return "", 0
+        return summary.context, summary.range
+
+    def pending_queryset(self, conversation, watermark):
+        return (
+            Message.objects.filter(conversation=conversation, seq__gt=watermark)
+            .order_by("seq")
+            .values_list("message_type", "content", "token_count")
+        )
+
+    def load_pending(self, conversation, watermark):
+        return [
+            (message_role(message_type), content, token_count)
+            for message_type, content, token_count in self.pending_queryset(
+                conversation, watermark
+            )
+        ]
+
+    def needs_roll(self, pending_count):
+        return pending_count >= self.batch_size
+
+    def schedule(self, conversation_id, model_uuid, pending_count):
+        """
+        Enqueues a background roll once enough messages are pending. Failing to
+        enqueue only delays the summary, so errors are logged and swallowed.
+        """
+        if not self.needs_roll(pending_count):
+            return False
+        try:
+            return enqueue_summary(conversation_id, model_uuid)
+        except Exception as ex:
+            logger.warning("Failed to enqueue summary job: %s", ex)
+            return False
+
+    def roll(self, conversation):
+        """
+        Folds complete batches of pending messages into the conversation summary.
+
+        Returns:
+            tuple: same shape as read(), after folding.
+        """
+        context, watermark = self.load_summary(conversation)
+
+        pending = self.load_pending(conversation, watermark)
+
+        foldable = len(pending) - len(pending) % self.batch_size
+
+        for i in range(0, foldable, self.batch_size):
+            to_summarize = []
+            if context:
+                to_summarize.append(
+                    {"role": "system", "content": f"Previous summary: {context}"}
+                )
+            to_summarize.extend(
+                to_history_message(role, content)
+                for role, content, _ in pending[i : i + self.batch_size]
+            )
+
+            context = self.llm_service.summarize_messages(to_summarize)
+
+        if foldable:
+            watermark += foldable
+            Summary.objects.update_or_create(
+                conversation=conversation,
+                defaults={"context": context, "range": watermark},
+            )
+
+        return context, watermark, pending[foldable:]
+
+
+def enqueue_summary(conversation_id, model_uuid):
+    """
+    Schedules a background roll of the conversation summary. Deduplicated per
+    conversation while a job is still waiting.
+    """
+    return summary_queue.enqueue(
+        str(conversation_id),
+        {"conversation_id": str(conversation_id), "model_uuid": model_uuid},
+    )
+
+
+def process_summary_job(payload):
+    conversation = Conversation.objects.select_related("organization").get(
+        conversation_id=payload["conversation_id"]
+    )
+    llm_model = Model.objects.select_related("service").get(
+        uuid=payload["model_uuid"]
+    )
+
+    llm_service = LLMFactory().create(
+        service=llm_model.service.name,
+        api_key=conversation.organization.llm_api_key,
+        model=llm_model.model,
+    )
+
+    return SummaryService(llm_service).roll(conversation)
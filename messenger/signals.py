@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Conversation, Message
+from neon.conditional import resource_versions
+from .services.change_feed import publish_change
+
+
+# Messages saved one at a time (soft deletes, edits) and conversation renames.
+# persist_exchange bulk inserts and publishes on its own.
+@receiver(post_save, sender=Message)
+@receiver(post_save, sender=Conversation)
+def publish_conversation_change(sender, instance, **kwargs):
+    conversation_id = (
+        instance.conversation_id
+        if isinstance(instance, Message)
+        else instance.pk
+    )
+    scopes = [f"conversation:{conversation_id}"]
+    if isinstance(instance, Conversation):
+        scopes.append(f"conversations:{instance.created_by_id}")
+
+    def notify():
+        publish_change(conversation_id)
+        resource_versions.bump(*scopes)
+
+    transaction.on_commit(notify)
@@ -1,3 +1,368 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils.timezone import now
+from llm.utils.token_counting import MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+from messenger.models import Conversation, ConversationReadState, Message
+from messenger.services.change_feed import deleted_queryset, inserted_queryset
+from messenger.services.chat_turn import TurnAttempt
+from messenger.services.context_builder import ContextBuilder
+from messenger.services.history_cache import HistoryCache
+from messenger.services.memory_index import ScopeIndex
+from messenger.services.read_state import read_state_queryset
+from messenger.services.summary_service import SummaryService
+from messenger.views import (
+    MessagePagination,
+    conversation_list_queryset,
+    message_page_queryset,
+    message_search_queryset,
+    parse_search_cursor,
+    searchable_conversations,
+)
+from neon.pagination import KeysetPagination
+from neon.testing import (
+    QueryPlanTestCase,
+    requires_postgres,
+    seed_accounts,
+    seed_organizations,
+)
+from neon.utils.pagination_tools import encode_cursor
+from neon.utils.sse_tools import FLUSH_DUE, token_frame
+from pathlib import Path
+from rest_framework.test import APIClient
+import numpy as np
+import tempfile
+import uuid
 
-# Create your tests here.
+ACCOUNTS = 200
+CONVERSATIONS_PER_ACCOUNT = 10
+MESSAGES_PER_CONVERSATION = 10
+LONG_CONVERSATION_MESSAGES = 20000
+
+
+class MessengerQueryPlanTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        accounts = seed_accounts(ACCOUNTS)
+        organizations = seed_organizations(accounts)
+
+        conversations = Conversation.objects.bulk_create(
+            [
+                Conversation(
+                    organization=organization,
+                    name=f"Conversation {index} of {account.username}",
+                    created_by=account,
+                )
+                for account, organization in zip(accounts, organizations)
+                for index in range(CONVERSATIONS_PER_ACCOUNT)
+            ],
+            batch_size=1000,
+        )
+        cls.account = accounts[0]
+        cls.long_conversation = conversations[0]
+
+        messages = [
+            Message(
+                conversation=cls.long_conversation,
+                message_type="text",
+                content=f"Message {index} about topic{index % 100}",
+                seq=index + 1,
+                # A few soft-deleted messages, as in a real conversation
+                deleted_at=now() if index % 1000 == 0 else None,
+            )
+            for index in range(LONG_CONVERSATION_MESSAGES)
+        ]
+        messages += [
+            Message(
+                conversation=conversation,
+                message_type="text",
+                content=f"Message {index} about topic{index % 100}",
+                seq=index + 1,
+            )
+            for conversation in conversations[1:]
+            for index in range(MESSAGES_PER_CONVERSATION)
+        ]
+        cls.messages = Message.objects.bulk_create(messages, batch_size=2000)
+
+        ConversationReadState.objects.bulk_create(
+            [
+                ConversationReadState(
+                    account_id=conversation.created_by_id,
+                    conversation=conversation,
+                    last_seen_seq=MESSAGES_PER_CONVERSATION,
+                    last_delivered_seq=MESSAGES_PER_CONVERSATION,
+                )
+                for conversation in conversations
+            ],
+            batch_size=1000,
+        )
+
+        cls.analyze(Conversation, Message, ConversationReadState)
+
+    def message_page(self, before=None, after=None):
+        # Built by the same code as MessagingView.get
+        cursor = lambda message: [message.created_at, message.pk]
+        return MessagePagination().page_queryset(
+            message_page_queryset(self.long_conversation.conversation_id),
+            before=before and cursor(before),
+            after=after and cursor(after),
+        )
+
+    def test_message_page(self):
+        queryset = self.message_page()
+        self.assertUsesIndex(queryset, Message, "message_conversation_created")
+        self.assertNoSort(queryset)
+
+    def test_message_page_before_cursor(self):
+        queryset = self.message_page(
+            before=self.messages[LONG_CONVERSATION_MESSAGES // 2]
+        )
+        self.assertUsesIndex(queryset, Message, "message_conversation_created")
+        self.assertNoSort(queryset)
+
+    def test_message_page_after_cursor(self):
+        queryset = self.message_page(
+            after=self.messages[LONG_CONVERSATION_MESSAGES // 2]
+        )
+        self.assertUsesIndex(queryset, Message, "message_conversation_created")
+        self.assertNoSort(queryset)
+
+    def test_conversation_list(self):
+        # Built by the same code as MessagingListView.get
+        queryset = KeysetPagination().page_queryset(
+            conversation_list_queryset(self.account)
+        )
+        self.assertUsesIndex(queryset, Conversation, "conversation_creator_created")
+        # The unread count subquery is a lookup per listed conversation
+        self.assertUsesIndex(queryset, ConversationReadState)
+        self.assertNoSort(queryset)
+
+    def test_read_state_upsert(self):
+        # Rows updated by read_state.advance
+        queryset = read_state_queryset(
+            self.account.pk, self.long_conversation.conversation_id
+        )
+        self.assertUsesIndex(
+            queryset, ConversationReadState, "conversation_read_state_unique"
+        )
+
+    def test_message_search(self):
+        # Built by the same code as MessageSearchView.get
+        conversations = searchable_conversations(
+            self.account, self.long_conversation.organization
+        )
+        queryset = message_search_queryset(conversations, "topic7")
+        self.assertUsesIndex(queryset, Message)
+
+    def test_sync_inserted(self):
+        queryset = inserted_queryset(
+            self.long_conversation.conversation_id, LONG_CONVERSATION_MESSAGES - 5
+        )
+        self.assertUsesIndex(queryset, Message, "message_conversation_seq")
+        self.assertNoSort(queryset)
+
+    def test_sync_deleted(self):
+        queryset = deleted_queryset(
+            self.long_conversation.conversation_id,
+            LONG_CONVERSATION_MESSAGES,
+            now().isoformat(),
+        )
+        self.assertUsesIndex(queryset, Message, "message_conversation_deleted")
+
+    def test_history_rebuild(self):
+        queryset = HistoryCache().tail_queryset(
+            self.long_conversation.conversation_id
+        )
+        self.assertUsesIndex(queryset, Message, "message_conversation_seq")
+        self.assertNoSort(queryset)
+
+    def test_pending_after_watermark(self):
+        queryset = SummaryService(None).pending_queryset(
+            self.long_conversation, LONG_CONVERSATION_MESSAGES - 30
+        )
+        self.assertUsesIndex(queryset, Message, "message_conversation_seq")
+        self.assertNoSort(queryset)
+
+
+class ContextBuilderTests(SimpleTestCase):
+    def test_budget_capped_by_context_limit(self):
+        builder = ContextBuilder(context_limit=1000, budget=4000, completion_reserve=200)
+        self.assertEqual(builder.budget, 800)
+
+    def test_keeps_everything_within_budget(self):
+        tail = [("user", "hello", 0), ("assistant", "hi there", 0)]
+        history, _ = ContextBuilder(budget=1000).build("earlier", tail, ["prompt"])
+
+        self.assertEqual(
+            history,
+            [
+                {"role": "system", "content": "Summary so far: earlier"},
+                {"role": "user", "content": "History: hello"},
+                {"role": "assistant", "content": "History: hi there"},
+            ],
+        )
+
+    def test_truncates_oldest_message_and_drops_older(self):
+        tail = [
+            ("user", "dropped " * 100, 200),
+            ("user", "x" * 1000, 250),
+            ("assistant", "newest", 2),
+        ]
+        history, prompt_tokens = ContextBuilder(budget=100).build("", tail)
+
+        self.assertEqual(len(history), 2)
+        self.assertTrue(history[0]["content"].startswith("..."))
+        self.assertEqual(history[1]["content"], "History: newest")
+        self.assertLessEqual(prompt_tokens, 100)
+
+    def test_drops_message_too_small_to_truncate(self):
+        tail = [("user", "x" * 1000, 250), ("assistant", "newest", 2)]
+        budget = 2 + estimate_tokens("History: ") + 2 * MESSAGE_OVERHEAD_TOKENS + 10
+        history, _ = ContextBuilder(budget=budget).build("", tail)
+
+        self.assertEqual(history, [{"role": "assistant", "content": "History: newest"}])
+
+    def test_fixed_texts_are_always_counted(self):
+        history, prompt_tokens = ContextBuilder(budget=10).build(
+            "summary", [("user", "hello", 0)], ["x" * 400]
+        )
+
+        self.assertEqual(history, [])
+        self.assertEqual(prompt_tokens, 100 + MESSAGE_OVERHEAD_TOKENS)
+
+
+@requires_postgres
+class MessageSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        accounts = seed_accounts(1)
+        organizations = seed_organizations(accounts)
+        cls.account = accounts[0]
+        conversation = Conversation.objects.create(
+            organization=organizations[0], name="Search", created_by=cls.account
+        )
+        # Same content, so every message has the same rank
+        cls.messages = Message.objects.bulk_create(
+            [
+                Message(
+                    conversation=conversation,
+                    message_type="text",
+                    content="The quarterly report is ready",
+                    seq=index + 1,
+                )
+                for index in range(5)
+            ]
+        )
+
+    def search(self, **params):
+        client = APIClient()
+        client.force_authenticate(user=self.account)
+        return client.get(reverse("api-messenger:messenger-search"), {"q": "report", **params})
+
+    def test_tied_ranks_span_pages(self):
+        found = []
+        cursor = None
+        while True:
+            params = {"page_size": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.search(**params)
+            self.assertEqual(response.status_code, 200)
+            found += [row["message_id"] for row in response.data["messages"]]
+            cursor = response.data["next"]
+            if cursor is None:
+                break
+
+        self.assertEqual(
+            sorted(map(str, found)),
+            sorted(str(message.message_id) for message in self.messages),
+        )
+
+    def test_malformed_cursor_starts_over(self):
+        response = self.search(cursor=encode_cursor(["high", "nope"]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["messages"]), 5)
+
+
+class SearchCursorTests(SimpleTestCase):
+    def test_valid_cursor(self):
+        message_id = uuid.uuid4()
+
+        self.assertEqual(
+            parse_search_cursor(encode_cursor([0.0607927106320858, str(message_id)])),
+            [0.0607927106320858, message_id],
+        )
+
+    def test_malformed_cursors(self):
+        for values in [
+            ["high", str(uuid.uuid4())],
+            [True, str(uuid.uuid4())],
+            [0.5, "nope"],
+            [0.5, 42],
+            [0.5],
+        ]:
+            self.assertIsNone(parse_search_cursor(encode_cursor(values)), values)
+
+
+class TurnAttemptTests(SimpleTestCase):
+    def test_frames_each_token(self):
+        attempt = TurnAttempt(1, coalesce=False)
+
+        self.assertEqual(attempt.push("Hel"), [token_frame("Hel")])
+        self.assertEqual(attempt.push(None), [])
+        self.assertEqual(attempt.push("lo"), [token_frame("lo")])
+        self.assertEqual(attempt.flush(), [])
+        self.assertEqual(attempt.reply(), "Hello")
+
+    def test_coalesces_until_flush(self):
+        attempt = TurnAttempt(1, coalesce=True)
+
+        self.assertEqual(attempt.push("Hel"), [])
+        self.assertEqual(attempt.push(FLUSH_DUE), [token_frame("Hel")])
+        self.assertEqual(attempt.push("lo"), [])
+        self.assertEqual(attempt.flush(), [token_frame("lo")])
+        self.assertEqual(attempt.reply(), "Hello")
+
+
+class ScopeIndexTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.index = ScopeIndex(Path(directory.name) / "scope", window=5)
+        self.committed = {}
+
+    def fetch(self, floor, known):
+        return [
+            (row_id, vector)
+            for row_id, vector in sorted(self.committed.items())
+            if row_id > floor and row_id not in known
+        ]
+
+    def commit(self, *row_ids):
+        for row_id in row_ids:
+            vector = np.zeros(4, np.float32)
+            vector[row_id % 4] = 1
+            self.committed[row_id] = vector.tobytes()
+
+    def indexed(self):
+        return self.index.indexed_ids(self.index.size).tolist()
+
+    def test_late_commit_below_newest_id_is_indexed(self):
+        self.commit(1, 2, 4, 5)
+        self.index.sync(self.fetch)
+        # Allocated before 4 and 5, committed after the first sync
+        self.commit(3)
+        self.index.sync(self.fetch)
+        self.index.sync(self.fetch)
+
+        self.assertEqual(self.indexed(), [1, 2, 4, 5, 3])
+        query = np.eye(4, dtype=np.float32)[3]
+        self.assertEqual(self.index.search(query, 1), [(3, 1.0)])
+
+    def test_commit_beyond_window_is_skipped(self):
+        self.commit(1, 20)
+        self.index.sync(self.fetch)
+        self.commit(2)
+        self.index.sync(self.fetch)
+
+        self.assertEqual(self.indexed(), [1, 20])
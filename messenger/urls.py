@@ -2,7 +2,7 @@ from django.conf.urls import include
 from django.urls import re_path, path
 from rest_framework import routers
 
-from messenger import views
+from messenger import views, async_views
 
 router = routers.DefaultRouter()
 
@@ -12,14 +12,34 @@ urlpatterns = [
     re_path("", include((router.urls, "messenger-routes"))),
     path(
         "<str:conversation_id>/",
-        views.MessagingView.as_view(),
+        async_views.conversation,
         name="messenger-conversation",
     ),
+    path(
+        "<str:conversation_id>/stream/",
+        async_views.stream_chat,
+        name="messenger-conversation-stream",
+    ),
+    path(
+        "<str:conversation_id>/changes/",
+        async_views.sync_changes,
+        name="messenger-conversation-changes",
+    ),
+    path(
+        "<str:conversation_id>/read/",
+        views.ConversationReadView.as_view(),
+        name="messenger-conversation-read",
+    ),
     path(
         "list",
         views.MessagingListView.as_view(),
         name="messenger-list",
     ),
+    path(
+        "search",
+        views.MessageSearchView.as_view(),
+        name="messenger-search",
+    ),
     path(
         "conversation",
         views.ConversationView.as_view(),
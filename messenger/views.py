@@ -3,304 +3,359 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
-from messenger.models import Conversation, Message, Summary
-from messenger.serializers import ConversationSerializer, MessageSerializer
-from llm.models import Agent, Model
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db.models import F, FloatField, OuterRef, Q, Subquery
+from django.db.models.functions import Cast, Coalesce
+from messenger.models import Conversation, ConversationReadState, Message
+from messenger.serializers import (
+    MESSAGE_PAGE_FIELDS,
+    ConversationSerializer,
+    serialize_message_page,
+)
 from organization.models import Member
-from llm.serializers import ToolSerializer
 from django.http import StreamingHttpResponse
-from neon.utils.parsing_tools import stringify_json
+from neon.conditional import conditional_get
+from neon.pagination import KeysetPagination
+from neon.utils.pagination_tools import decode_cursor, encode_cursor
 import uuid
 
 # from llm.services.groq_service import GroqService
-from llm.services.llm_factory import LLMFactory
-from llm.utils.llm_response_parsing import handle_llm_response
-
-
-class Pagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = "page_size"
+from messenger.services.chat_turn import ChatTurn
+from messenger.services.read_state import advance
+
+
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+SEARCH_CONVERSATION_LIMIT = 5
+
+
+def conversation_list_queryset(user):
+    """
+    The caller's conversations with their unread count, from the caller's read
+    watermark. Paginated by MessagingListView.
+    """
+    last_seen_seq = ConversationReadState.objects.filter(
+        conversation=OuterRef("pk"), account=user
+    ).values("last_seen_seq")[:1]
+    return Conversation.objects.filter(created_by=user).annotate(
+        unread_count=F("last_seq") - Coalesce(Subquery(last_seen_seq), 0)
+    )
+
+
+def message_page_queryset(conversation_id):
+    """
+    Messages of a conversation as plain rows instead of model instances, see
+    serialize_message_page. Paginated by MessagingView.
+    """
+    return Message.objects.filter(conversation_id=conversation_id).values(
+        *MESSAGE_PAGE_FIELDS
+    )
+
+
+def searchable_conversations(user, organization):
+    return Conversation.objects.filter(created_by=user, organization=organization)
+
+
+def message_search_queryset(conversations, term, cursor=None):
+    """
+    Messages of conversations matching term, best first from a (rank,
+    message_id) cursor, with highlighted headlines.
+    """
+    query = SearchQuery(term, search_type="websearch", config="english")
+    messages = (
+        Message.objects.filter(
+            conversation__in=conversations.values("conversation_id"),
+            deleted_at__isnull=True,
+            search_vector=query,
+        )
+        # ts_rank is a real, compared as a double it would never equal the
+        # value printed in a cursor, losing rows tied across a page boundary
+        .annotate(rank=Cast(SearchRank(F("search_vector"), query), FloatField()))
+        .order_by("-rank", "message_id")
+    )
+    if cursor:
+        rank, message_id = cursor
+        messages = messages.filter(
+            Q(rank__lt=rank) | Q(rank=rank, message_id__gt=message_id)
+        )
+
+    return messages.annotate(
+        headline=SearchHeadline(
+            "content",
+            query,
+            config="english",
+            start_sel="<mark>",
+            stop_sel="</mark>",
+        )
+    ).values(
+        "message_id",
+        "conversation_id",
+        "message_type",
+        "headline",
+        "rank",
+        "created_at",
+    )
+
+
+def parse_search_cursor(cursor):
+    """
+    Returns the (rank, message_id) of a search cursor, or None when it is
+    missing or malformed, which is answered like a missing cursor.
+    """
+    values = decode_cursor(cursor, size=2)
+    if values is None:
+        return None
+    rank, message_id = values
+    if not isinstance(rank, (int, float)) or isinstance(rank, bool):
+        return None
+    try:
+        return [float(rank), uuid.UUID(message_id)]
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def conversation_search_queryset(conversations, term):
+    return (
+        conversations.filter(name__trigram_similar=term)
+        .annotate(similarity=TrigramSimilarity("name", term))
+        .order_by("-similarity")
+        .values("conversation_id", "name", "similarity", "created_at")
+    )
 
 
 class MessagingListView(APIView):
     permission_classes = [IsAuthenticated]
-    pagination_class = Pagination
+    pagination_class = KeysetPagination
 
     def get(self, request):
         try:
             user = self.request.user
 
-            query_set = Conversation.objects.filter(created_by=user).order_by(
-                "-created_at"
-            )
+            def build():
+                query_set = conversation_list_queryset(user)
 
-            paginator = self.pagination_class()
-            paginated_queryset = paginator.paginate_queryset(
-                query_set, request, view=self
-            )
+                paginator = self.pagination_class()
+                paginated_queryset = paginator.paginate_queryset(
+                    query_set, request, view=self
+                )
 
-            serialized_result = ConversationSerializer(paginated_queryset, many=True)
-            data = paginator.get_paginated_response(serialized_result.data)
+                serialized_result = ConversationSerializer(
+                    paginated_queryset, many=True
+                )
+                return paginator.get_paginated_response(serialized_result.data)
 
-            return data
+            # Unchanged lists are answered with 304 before any query
+            return conditional_get(request, [f"conversations:{user.pk}"], build)
         except Exception as ex:
             return Response(ex, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class MessagePagination(KeysetPagination):
+    pk_field = "message_id"
+
+
 class MessagingView(APIView):
     permission_classes = [IsAuthenticated]
-    pagination_class = Pagination
+    pagination_class = MessagePagination
 
     def get(self, request, conversation_id):
         try:
             user = self.request.user
 
-            query_set = Message.objects.filter(
-                conversation_id=conversation_id
-            ).order_by("-created_at")
+            def build():
+                query_set = message_page_queryset(conversation_id)
 
-            paginator = self.pagination_class()
-            paginated_queryset = paginator.paginate_queryset(
-                query_set, request, view=self
-            )
+                paginator = self.pagination_class()
+                paginated_queryset = paginator.paginate_queryset(
+                    query_set, request, view=self
+                )
 
-            serialized_result = MessageSerializer(paginated_queryset, many=True)
-            data = paginator.get_paginated_response(serialized_result.data)
+                return paginator.get_paginated_response(
+                    serialize_message_page(paginated_queryset)
+                )
 
-            return data
+            # Unchanged pages are answered with 304 before any query
+            return conditional_get(request, [f"conversation:{conversation_id}"], build)
         except Exception as ex:
             return Response(ex, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def post(self, request, conversation_id):
         try:
-            user = self.request.user
-            message_type = request.data.get("message_type")
-            content = request.data.get("content")
-            agent_uuid = request.data.get("agent_uuid")
-            model_uuid = request.data.get("model_uuid")
-
-            conversation = Conversation.objects.get(conversation_id=conversation_id)
-            agent = Agent.objects.get(uuid=agent_uuid)
-            enabled_tools_qs = agent.role.tools.filter(is_enabled=True)
-            tools = ToolSerializer(enabled_tools_qs, many=True).data
-            llm_model = Model.objects.get(uuid=model_uuid)
-
-            llm_service = LLMFactory().create(
-                service=llm_model.service.name,
-                api_key=conversation.organization.llm_api_key,
-                model=llm_model.model,
-            )
-
-            history = []
-
-            batch_size = 20
-
-            try:
-                messages = Message.objects.filter(conversation=conversation).order_by(
-                    "created_at"
-                )
-                serialized_messages = MessageSerializer(messages, many=True).data
-
-                # Prepare messages for summarization
-                def build_messages_for_batch(batch):
-                    return [
-                        {
-                            "role": (
-                                "user" if msg["message_type"] == "text" else "assistant"
-                            ),
-                            "content": f"History: {msg['content']}",
-                        }
-                        for msg in batch
-                    ]
+            turn = ChatTurn.prepare(conversation_id, self.request.user, request.data)
 
-                # Get existing summary range if any
-                summary = Summary.objects.get(conversation=conversation)
-                last_range = summary.range
-
-                total_messages = len(serialized_messages)
-
-                # Only summarize if total messages >= last range + batch_size
-                if total_messages - last_range >= batch_size or last_range == 0:
-                    batches = [
-                        serialized_messages[i : i + batch_size]
-                        for i in range(0, total_messages, batch_size)
-                    ]
-
-                    cumulative_summary = ""
-                    for batch in batches:
-                        batch_messages = build_messages_for_batch(batch)
-                        to_summarize = []
-                        if cumulative_summary:
-                            to_summarize.append(
-                                {
-                                    "role": "system",
-                                    "content": f"Previous summary: {cumulative_summary}",
-                                }
-                            )
-                        to_summarize.extend(batch_messages)
-
-                        cumulative_summary = llm_service.summarize_messages(
-                            to_summarize
-                        )  # your LLM summarizer
-
-                    # Update summary and range
-                    Summary.objects.update_or_create(
-                        conversation=conversation,
-                        defaults={
-                            "context": cumulative_summary,
-                            "range": total_messages,
-                        },
-                    )
-
-                # Build final history with summary and leftover
-                history = [
-                    {
-                        "role": "system",
-                        "content": f"Summary so far: {summary.context if summary else ''}",
-                    }
-                ]
-
-                leftover_start = last_range if last_range else 0
-                leftover_messages = serialized_messages[leftover_start:]
-                history.extend(build_messages_for_batch(leftover_messages))
-
-            except Summary.DoesNotExist:
-                to_summarize = []
-                messages = Message.objects.filter(conversation=conversation)
-                serialized_messages = MessageSerializer(messages, many=True).data
-
-                if messages.count() >= batch_size:
-                    for msg in serialized_messages:
-                        to_summarize.append(
-                            {
-                                "role": (
-                                    "user"
-                                    if msg["message_type"] == "text"
-                                    else "assistant"
-                                ),
-                                "content": f'History: {msg["content"]}',
-                            }
-                        )
-                        history.append(
-                            {
-                                "role": (
-                                    "user"
-                                    if msg["message_type"] == "text"
-                                    else "assistant"
-                                ),
-                                "content": f'History: {msg["content"]}',
-                            }
-                        )
-
-                    raw_summary = llm_service.summarize_messages(to_summarize)
-
-                    Summary.objects.create(
-                        conversation=conversation, context=raw_summary, range=batch_size
-                    )
-
-                else:
-                    for msg in serialized_messages:
-                        history.append(
-                            {
-                                "role": (
-                                    "user"
-                                    if msg["message_type"] == "text"
-                                    else "assistant"
-                                ),
-                                "content": f'History: {msg["content"]}',
-                            }
-                        )
+            def replay_response():
+                yield from turn.replay()
+                turn.replayed()
 
             def stream_response():
-                max_retries = 3
-                attempts = 0
-
-                while attempts < max_retries:
+                while True:
+                    attempt = turn.attempt()
                     try:
-                        combined = []
-                        for token in llm_service.stream_chat_completion(
-                            history, agent.role.system_prompt, content, tools
+                        for token in turn.llm_service.stream_chat_completion(
+                            *turn.completion_args()
                         ):
-                            if token is not None:
-                                combined.append(token)
-                                yield f'data: {stringify_json({"status": True, "token": token})}\n\n'
-
-                        new_message = Message(
-                            conversation=conversation,
-                            sender=user,
-                            agent=None,
-                            message_type=message_type,
-                            content=content,
-                        )
-
-                        new_message.save()
-
-                        new_message.receivers.add(user)
-                        new_message.seeners.add(user)
-
-                        full_reply = "".join(combined)
-
-                        ai_reply = Message(
-                            conversation=conversation,
-                            sender=None,
-                            agent=agent,
-                            message_type="ai_reply",
-                            content=handle_llm_response(full_reply),
-                        )
-                        ai_reply.save()
-                        ai_reply.receivers.add(user)
-                        ai_reply.seeners.add(user)
+                            yield from attempt.push(token)
+                        yield from attempt.flush()
 
+                        turn.complete(attempt.reply())
                         # Exit if successful
                         return
 
                     except Exception as ex:
-                        attempts += 1
-                        # Provide immediate feedback of failure to client
-                        yield f'data: {stringify_json({"status": False, "message": f"Attempt {attempts} failed: {str(ex)}"})}\n\n'
-                        if attempts >= max_retries:
-                            new_message = Message(
-                                conversation=conversation,
-                                sender=user,
-                                agent=None,
-                                message_type=message_type,
-                                content=content,
-                            )
-
-                            new_message.save()
-
-                            new_message.receivers.add(user)
-                            new_message.seeners.add(user)
-
-                            # Generate a final message using LLM to inform user there's a persistent problem
-                            error_message = "Sorry, there is a problem processing your request. Please try again later."
-
-                            ai_reply = Message(
-                                conversation=conversation,
-                                sender=None,
-                                agent=agent,
-                                message_type="ai_reply",
-                                content=error_message,
-                            )
-                            ai_reply.save()
-                            ai_reply.receivers.add(user)
-                            ai_reply.seeners.add(user)
-
-                            yield f'data: {stringify_json({"status": False, "token": error_message})}\n\n'
+                        frames, retry = turn.failed(attempt, ex)
+                        yield from frames
+                        if not retry:
                             return
 
             return StreamingHttpResponse(
-                stream_response(),
+                stream_response() if turn.cached_reply is None else replay_response(),
                 content_type="text/event-stream",
-                headers={
-                    "Cache-Control": "no-cache",
-                },
+                headers=turn.headers(),
             )
 
         except Exception as ex:
             return Response(ex, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
+
+
+class MessageSearchView(APIView):
+    """
+    Ranked full-text search over the caller's conversations in their
+    organization. Messages are matched through the GIN indexed
+    Message.search_vector and keyset paginated on (rank, message_id),
+    conversation names are matched by trigram similarity on the first page.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            user = self.request.user
+            term = (request.query_params.get("q") or "").strip()
+            if not term:
+                return Response(
+                    {"messages": [], "conversations": [], "next": None},
+                    status=status.HTTP_200_OK,
+                )
+
+            try:
+                page_size = int(request.query_params.get("page_size", SEARCH_PAGE_SIZE))
+            except ValueError:
+                page_size = SEARCH_PAGE_SIZE
+            page_size = max(1, min(page_size, MAX_SEARCH_PAGE_SIZE))
+            cursor = parse_search_cursor(request.query_params.get("cursor"))
+
+            member = Member.objects.get(account=user)
+            conversations = searchable_conversations(user, member.organization)
+
+            results = list(
+                message_search_queryset(conversations, term, cursor)[: page_size + 1]
+            )
+
+            next_cursor = None
+            if len(results) > page_size:
+                results = results[:page_size]
+                last = results[-1]
+                next_cursor = encode_cursor([last["rank"], str(last["message_id"])])
+
+            matched_conversations = []
+            if cursor is None:
+                matched_conversations = list(
+                    conversation_search_queryset(conversations, term)[
+                        :SEARCH_CONVERSATION_LIMIT
+                    ]
+                )
+
+            return Response(
+                {
+                    "messages": results,
+                    "conversations": matched_conversations,
+                    "next": next_cursor,
+                },
+                status=status.HTTP_200_OK,
+            )
+        except Exception as ex:
+            return Response(str(ex), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ConversationReadView(APIView):
+    """
+    Marks a conversation the caller created read (and delivered) up to a seq,
+    defaulting to its newest message. Every earlier message is covered by the
+    same single write.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, conversation_id):
+        try:
+            user = self.request.user
+
+            conversation = (
+                Conversation.objects.filter(
+                    conversation_id=conversation_id, created_by=user
+                )
+                .only("last_seq")
+                .first()
+            )
+            if conversation is None:
+                return Response(
+                    {"status": False, "message": "Conversation not found"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+
+            seen_seq = parse_seq(request.data.get("seen_seq"), conversation.last_seq)
+            delivered_seq = parse_seq(request.data.get("delivered_seq"), seen_seq)
+            if seen_seq is None or delivered_seq is None:
+                return Response(
+                    {
+                        "status": False,
+                        "message": "seen_seq and delivered_seq must be non-negative integers",
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            seen_seq = min(seen_seq, conversation.last_seq)
+            delivered_seq = min(delivered_seq, conversation.last_seq)
+
+            advance(user.pk, conversation_id, seen_seq, delivered_seq)
+            state = ConversationReadState.objects.get(
+                account=user, conversation_id=conversation_id
+            )
+
+            return Response(
+                {
+                    "last_seen_seq": state.last_seen_seq,
+                    "last_delivered_seq": state.last_delivered_seq,
+                    "unread_count": conversation.last_seq - state.last_seen_seq,
+                },
+                status=status.HTTP_200_OK,
+            )
+        except Exception as ex:
+            return Response(str(ex), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def parse_seq(value, default):
+    """
+    Returns the seq sent by the client, default when missing, or None when it
+    isn't a non-negative integer.
+    """
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return None
+    try:
+        seq = int(value)
+    except (TypeError, ValueError):
+        return None
+    if seq < 0 or (isinstance(value, float) and value != seq):
+        return None
+    return seq
+
+
 class ConversationView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -1,10 +1,32 @@
 from django.contrib.auth.backends import BaseBackend
-from user.models import Account, Token
+from django.db.models import Q
+from django.utils.timezone import now
+from user.models import Account, Token, hash_token
+from user.tokens import token_usage
+from .principals import principal_cache
 from .utils.jwt_tools import JWTTools
 
 jwt = JWTTools
 
 
+def session_account_queryset(username):
+    """
+    The account of a JWT, resolved by the username it carries.
+    """
+    return Account.objects.filter(username=username)
+
+
+def developer_token_queryset(digest):
+    """
+    The unexpired token with this digest and its account, in one query.
+    """
+    return (
+        Token.objects.select_related("account")
+        .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now()))
+        .filter(token=digest)
+    )
+
+
 class AutheticationBackend(BaseBackend):
 
     def authenticate(self, request):
@@ -13,14 +35,32 @@ class AutheticationBackend(BaseBackend):
             token = request.headers.get("x-developer-token")
 
             if auth_token:
-                decoded_header = jwt.decoder(auth_token)
-                decoded_id = decoded_header["userID"]
+                user = principal_cache.get(auth_token)
+                if user is None:
+                    decoded_header = jwt.decoder(auth_token)
+                    decoded_id = decoded_header["userID"]
 
-                user = Account.objects.get(username=decoded_id)
+                    user = session_account_queryset(decoded_id).get()
+                    principal_cache.set(
+                        auth_token, user, expires_at=decoded_header.get("exp")
+                    )
                 return (user, True)
             elif token:
-                loaded_token = Token.objects.get(token=token)
-                user = Account.objects.get(username=loaded_token.account.username)
+                digest = hash_token(token)
+                user = principal_cache.get(token)
+                if user is None:
+                    loaded_token = developer_token_queryset(digest).get()
+                    user = loaded_token.account
+                    principal_cache.set(
+                        token,
+                        user,
+                        expires_at=(
+                            loaded_token.expires_at.timestamp()
+                            if loaded_token.expires_at
+                            else None
+                        ),
+                    )
+                token_usage.touch(digest)
                 return (user, True)
         except Account.DoesNotExist:
             return None
@@ -0,0 +1,116 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.response import Response
+from .utils.pagination_tools import decode_cursor, encode_cursor
+
+
+class KeysetPagination:
+    """
+    Newest-first cursor pagination keyed on (created_at, pk).
+
+    Pages are selected with a range condition on the sort key instead of
+    OFFSET, and without a COUNT, so every page costs the same whatever its
+    depth and rows inserted while scrolling do not shift later pages. The
+    "before" cursor loads older rows, the "after" cursor loads rows newer than
+    the page, for infinite scroll in both directions.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering_field = "created_at"
+    # Key of the primary key in rows paginated as values() dicts
+    pk_field = "pk"
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def cursor_for(self, row):
+        if isinstance(row, dict):
+            created_at, pk = row[self.ordering_field], row[self.pk_field]
+        else:
+            created_at, pk = getattr(row, self.ordering_field), row.pk
+        return encode_cursor([created_at.isoformat(), str(pk)])
+
+    def parse_cursor(self, queryset, cursor):
+        """
+        Returns the (created_at, pk) of a cursor, or None when it is missing or
+        malformed, which is answered like a missing cursor.
+        """
+        values = decode_cursor(cursor, size=2)
+        if values is None:
+            return None
+        created_at, pk = values
+        try:
+            created_at = parse_datetime(created_at)
+            pk = queryset.model._meta.pk.to_python(pk)
+        except (TypeError, ValueError, ValidationError):
+            return None
+        if created_at is None or pk is None:
+            return None
+        return [created_at, pk]
+
+    def page_queryset(self, queryset, before=None, after=None, page_size=None):
+        """
+        The unevaluated query of a page: page_size + 1 rows from the cursor
+        outwards, oldest first after an "after" cursor, newest first otherwise.
+        """
+        page_size = page_size or self.page_size
+        field = self.ordering_field
+
+        if after:
+            created_at, pk = after
+            return queryset.filter(
+                Q(**{f"{field}__gt": created_at})
+                | Q(**{field: created_at, "pk__gt": pk})
+            ).order_by(field, "pk")[: page_size + 1]
+
+        if before:
+            created_at, pk = before
+            queryset = queryset.filter(
+                Q(**{f"{field}__lt": created_at})
+                | Q(**{field: created_at, "pk__lt": pk})
+            )
+        return queryset.order_by(f"-{field}", "-pk")[: page_size + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        before = self.parse_cursor(queryset, request.query_params.get("before"))
+        after = self.parse_cursor(queryset, request.query_params.get("after"))
+        rows = list(self.page_queryset(queryset, before, after, page_size))
+
+        if after:
+            # Rows closest to the cursor come first, keep the oldest of them
+            self.has_newer = len(rows) > page_size
+            self.has_older = True
+            self.page = list(reversed(rows[:page_size]))
+        else:
+            self.has_older = len(rows) > page_size
+            self.has_newer = before is not None
+            self.page = rows[:page_size]
+
+        self.request_after = request.query_params.get("after")
+        return self.page
+
+    def get_paginated_response(self, data):
+        if self.page:
+            before = self.cursor_for(self.page[-1]) if self.has_older else None
+            # Always returned so clients can poll for rows created later
+            after = self.cursor_for(self.page[0])
+        else:
+            before = None
+            after = self.request_after
+
+        return Response(
+            {
+                "before": before,
+                "after": after,
+                "has_newer": self.has_newer,
+                "results": data,
+            }
+        )
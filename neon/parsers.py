@@ -0,0 +1,22 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from .utils.parsing_tools import parse_json
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser backed by neon.utils.parsing_tools (orjson when available).
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        try:
+            body = stream.read()
+            if encoding.lower().replace("-", "") != "utf8":
+                body = body.decode(encoding)
+            return parse_json(body)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from user.models import hash_token
+from .utils.cache_tools import LocalLRU
+import copy
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def detached(account):
+    """
+    A copy of the account without the related objects and prefetches loaded
+    on it, to be cached.
+    """
+    account = copy.copy(account)
+    account._state.fields_cache = {}
+    account.__dict__.pop("_prefetched_objects_cache", None)
+    return account
+
+
+class PrincipalCache:
+    """
+    Caches the Account behind an access or developer token, so steady-state
+    authentication runs no query.
+
+    Entries live AUTH_PRINCIPAL_CACHE_TTL seconds in Redis and at most
+    AUTH_PRINCIPAL_LOCAL_TTL seconds in a per-process LRU in front of it,
+    never past the token's expiry. Tokens are stored hashed. Saving an
+    Account or deleting a Token drops its entries from Redis and from the
+    local LRU of the process doing it, other processes catch up within the
+    local TTL.
+
+    Every hit returns its own copy of the Account, so request.user is never
+    an instance shared by concurrent requests, and related objects are not
+    cached with it.
+    """
+
+    prefix = "auth-principal"
+
+    def __init__(self, max_local_entries=None):
+        self.local = LocalLRU(
+            max_local_entries or settings.AUTH_PRINCIPAL_LOCAL_MAX_ENTRIES
+        )
+
+    def key(self, token):
+        return self.digest_key(hash_token(token))
+
+    def digest_key(self, digest):
+        return f"{self.prefix}:{digest}"
+
+    def account_key(self, account_pk):
+        return f"{self.prefix}:account:{account_pk}"
+
+    def get(self, token):
+        key = self.key(token)
+        account = self.local.get(key)
+        if account is not None:
+            return copy.copy(account)
+
+        try:
+            account = cache.get(key)
+        except Exception as ex:
+            logger.warning("Principal cache unavailable: %s", ex)
+            return None
+
+        if account is not None:
+            self.local.set(
+                key, detached(account), settings.AUTH_PRINCIPAL_LOCAL_TTL
+            )
+        return account
+
+    def set(self, token, account, expires_at=None):
+        ttl = settings.AUTH_PRINCIPAL_CACHE_TTL
+        if expires_at is not None:
+            ttl = min(ttl, int(expires_at - time.time()))
+        if ttl <= 0:
+            return
+
+        key = self.key(token)
+        account = detached(account)
+        self.local.set(key, account, min(ttl, settings.AUTH_PRINCIPAL_LOCAL_TTL))
+        try:
+            cache.set(key, account, timeout=ttl)
+            # Remembered per account so they can be dropped when it changes
+            account_key = self.account_key(account.pk)
+            pipeline = get_redis_connection("default").pipeline()
+            pipeline.sadd(account_key, key)
+            pipeline.expire(account_key, settings.AUTH_PRINCIPAL_CACHE_TTL)
+            pipeline.execute()
+        except Exception as ex:
+            logger.warning("Principal cache unavailable: %s", ex)
+
+    def invalidate_account(self, account_pk):
+        self.local.delete_matching(lambda account: account.pk == account_pk)
+        try:
+            connection = get_redis_connection("default")
+            account_key = self.account_key(account_pk)
+            keys = [key.decode("utf-8") for key in connection.smembers(account_key)]
+            if keys:
+                cache.delete_many(keys)
+            connection.delete(account_key)
+        except Exception as ex:
+            logger.warning("Failed to invalidate principal cache: %s", ex)
+
+    def invalidate_digest(self, digest):
+        """
+        Drops the entry of a token known only by its digest, as stored in
+        Token.token.
+        """
+        key = self.digest_key(digest)
+        self.local.delete(key)
+        try:
+            cache.delete(key)
+        except Exception as ex:
+            logger.warning("Failed to invalidate principal cache: %s", ex)
+
+
+principal_cache = PrincipalCache()
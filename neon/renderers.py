@@ -0,0 +1,26 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from .utils.parsing_tools import dump_json
+
+encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by neon.utils.parsing_tools (orjson when available).
+
+    Types orjson does not handle natively (Decimal, lazy translations, query
+    sets, ...) are converted by DRF's own encoder, and so are datetimes, which
+    keep DRF's format ("Z" instead of "+00:00"). Indentation requested by the
+    client through the accept header is still honoured by the stdlib renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return dump_json(data, default=encoder.default, passthrough_datetime=True)
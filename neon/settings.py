@@ -41,6 +41,96 @@ MONGODB_DB = os.getenv("MONGODB_DB")
 
 MAILINGSERVICE = os.getenv("MAILINGSERVICE")
 
+# Upper bound of prompt tokens sent per chat turn, further capped by the
+# model's context_limit minus the tokens reserved for the completion
+LLM_CONTEXT_TOKEN_BUDGET = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", 6000))
+LLM_COMPLETION_TOKEN_RESERVE = int(os.getenv("LLM_COMPLETION_TOKEN_RESERVE", 1024))
+
+# Pooled LLM provider clients, see llm/services/client_registry.py
+LLM_CLIENT_REGISTRY_SIZE = int(os.getenv("LLM_CLIENT_REGISTRY_SIZE", 64))
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", 100))
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+)
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", 60))
+LLM_HTTP_CONNECT_TIMEOUT = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", 5))
+LLM_HTTP_READ_TIMEOUT = float(os.getenv("LLM_HTTP_READ_TIMEOUT", 120))
+
+# Cached agent execution plans, invalidated by llm/signals.py
+EXECUTION_PLAN_CACHE_TTL = int(os.getenv("EXECUTION_PLAN_CACHE_TTL", 3600))
+EXECUTION_PLAN_GENERATION_TTL = float(os.getenv("EXECUTION_PLAN_GENERATION_TTL", 5))
+
+# Exact-match reply cache, opted into per agent with Agent.response_cache_ttl
+RESPONSE_CACHE_MAX_ENTRIES_PER_AGENT = int(
+    os.getenv("RESPONSE_CACHE_MAX_ENTRIES_PER_AGENT", 1000)
+)
+
+# Tool calls requested in one turn run concurrently on a shared pool
+LLM_TOOL_CALL_MAX_WORKERS = int(os.getenv("LLM_TOOL_CALL_MAX_WORKERS", 16))
+LLM_TOOL_CALL_TIMEOUT = float(os.getenv("LLM_TOOL_CALL_TIMEOUT", 15))
+
+# Outgoing tool HTTP requests, per-tool timeouts are stored on llm.Tool
+TOOL_HTTP_POOL_MAXSIZE = int(os.getenv("TOOL_HTTP_POOL_MAXSIZE", 16))
+TOOL_HTTP_CONNECT_TIMEOUT = float(os.getenv("TOOL_HTTP_CONNECT_TIMEOUT", 3))
+TOOL_HTTP_READ_TIMEOUT = float(os.getenv("TOOL_HTTP_READ_TIMEOUT", 10))
+TOOL_HTTP_GET_RETRIES = int(os.getenv("TOOL_HTTP_GET_RETRIES", 2))
+TOOL_HTTP_RETRY_BACKOFF = float(os.getenv("TOOL_HTTP_RETRY_BACKOFF", 0.2))
+TOOL_HTTP_RETRY_BACKOFF_MAX = float(os.getenv("TOOL_HTTP_RETRY_BACKOFF_MAX", 2))
+
+# Response cache of GET tools, opted into per tool with Tool.cache_ttl
+TOOL_CACHE_LOCAL_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_LOCAL_MAX_ENTRIES", 512))
+TOOL_CACHE_MAX_BYTES = int(os.getenv("TOOL_CACHE_MAX_BYTES", 65536))
+TOOL_CACHE_STATS_INTERVAL = int(os.getenv("TOOL_CACHE_STATS_INTERVAL", 10))
+
+# Token coalescing for SSE chat streams, opted into per request
+SSE_COALESCE_MAX_DELAY_MS = int(os.getenv("SSE_COALESCE_MAX_DELAY_MS", 50))
+SSE_COALESCE_MAX_BYTES = int(os.getenv("SSE_COALESCE_MAX_BYTES", 1024))
+
+# Background jobs: seconds a queued job's dedupe key is held at most
+JOB_QUEUE_DEDUPE_TTL = int(os.getenv("JOB_QUEUE_DEDUPE_TTL", 3600))
+
+# Last N messages per conversation kept in the Redis history ring buffer
+MESSENGER_HISTORY_CACHE_SIZE = int(os.getenv("MESSENGER_HISTORY_CACHE_SIZE", 100))
+MESSENGER_HISTORY_CACHE_TTL = int(os.getenv("MESSENGER_HISTORY_CACHE_TTL", 86400))
+
+# Authenticated principals cached per token, see neon/principals.py
+AUTH_PRINCIPAL_CACHE_TTL = int(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", 300))
+AUTH_PRINCIPAL_LOCAL_TTL = int(os.getenv("AUTH_PRINCIPAL_LOCAL_TTL", 10))
+AUTH_PRINCIPAL_LOCAL_MAX_ENTRIES = int(
+    os.getenv("AUTH_PRINCIPAL_LOCAL_MAX_ENTRIES", 10000)
+)
+
+# Developer tokens: seconds between batched last_used_at writes
+DEVELOPER_TOKEN_LAST_USED_INTERVAL = int(
+    os.getenv("DEVELOPER_TOKEN_LAST_USED_INTERVAL", 60)
+)
+
+# Conditional GET: lifetime of resource version tokens in Redis
+CONDITIONAL_VERSION_TTL = int(os.getenv("CONDITIONAL_VERSION_TTL", 604800))
+
+# Delta sync: messages returned per call and the longest long-poll wait
+MESSENGER_SYNC_PAGE_SIZE = int(os.getenv("MESSENGER_SYNC_PAGE_SIZE", 100))
+MESSENGER_SYNC_MAX_WAIT = int(os.getenv("MESSENGER_SYNC_MAX_WAIT", 25))
+
+# Retrieval memory: messages are embedded when saved and, once enabled, the
+# most relevant older ones are recalled into the history. MEMORY_SCOPE is
+# "conversation" or "organization" (the caller's own conversations in it),
+# MEMORY_EMBEDDER is "hashing" (offline) or "openai". Vectors are searched
+# through memory-mapped files in MEMORY_INDEX_DIR
+MEMORY_RETRIEVAL_ENABLED = os.getenv("MEMORY_RETRIEVAL_ENABLED", "false") == "true"
+MEMORY_SCOPE = os.getenv("MEMORY_SCOPE", "conversation")
+MEMORY_EMBEDDER = os.getenv("MEMORY_EMBEDDER", "hashing")
+MEMORY_EMBEDDING_MODEL = os.getenv("MEMORY_EMBEDDING_MODEL", "text-embedding-3-small")
+MEMORY_EMBEDDING_DIMENSIONS = int(os.getenv("MEMORY_EMBEDDING_DIMENSIONS", 256))
+MEMORY_TOP_K = int(os.getenv("MEMORY_TOP_K", 5))
+MEMORY_MIN_SCORE = float(os.getenv("MEMORY_MIN_SCORE", 0.2))
+MEMORY_RECENT_MESSAGES = int(os.getenv("MEMORY_RECENT_MESSAGES", 6))
+MEMORY_INDEX_MAX_SCOPES = int(os.getenv("MEMORY_INDEX_MAX_SCOPES", 128))
+MEMORY_INDEX_DIR = os.getenv("MEMORY_INDEX_DIR", str(BASE_DIR / "memory_index"))
+# Embedding ids below the newest indexed one re-checked on every sync, for
+# rows whose INSERT committed late. Kept under Postgres' 65535 parameters.
+MEMORY_INDEX_RESYNC_WINDOW = int(os.getenv("MEMORY_INDEX_RESYNC_WINDOW", 10000))
+
 CSRF_TRUSTED_ORIGINS = ["https://*.chatterloop.app", "https://*.neonsystems.net"]
 
 CACHES = {
@@ -68,6 +158,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "corsheaders",
     # Added apps
@@ -96,6 +187,8 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 CORS_ALLOW_HEADERS = list(default_headers) + ["x-access-token", "paginated", "action"]
 
+CORS_EXPOSE_HEADERS = ["x-prompt-tokens", "x-response-cache", "etag"]
+
 ROOT_URLCONF = "neon.urls"
 
 TEMPLATES = [
@@ -115,6 +208,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "neon.wsgi.application"
 
+ASGI_APPLICATION = "neon.asgi.application"
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -174,6 +269,15 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "neon.backends.AutheticationBackend",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "neon.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "neon.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
 # Default primary key field type
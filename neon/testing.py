@@ -0,0 +1,105 @@
+from django.db import connection
+from django.test import TestCase
+from django.utils.timezone import now
+from neon.utils.parsing_tools import parse_json
+from organization.models import Member, Organization
+from user.models import Account
+import unittest
+
+INDEX_SCAN_NODES = ("Index Scan", "Index Only Scan", "Bitmap Heap Scan")
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def seed_accounts(count, prefix="user"):
+    return Account.objects.bulk_create(
+        [
+            Account(
+                username=f"{prefix}_{index}",
+                first_name="Test",
+                last_name=f"User {index}",
+                birthdate=now(),
+                gender="other",
+                email=f"{prefix}_{index}@example.com",
+            )
+            for index in range(count)
+        ],
+        batch_size=1000,
+    )
+
+
+def seed_organizations(accounts, prefix="org"):
+    """
+    Creates one organization per account, with the account as its only member.
+    """
+    organizations = Organization.objects.bulk_create(
+        [
+            Organization(
+                name=f"{prefix} {index}",
+                slug=f"{prefix}-{index}",
+                created_by=account,
+            )
+            for index, account in enumerate(accounts)
+        ],
+        batch_size=1000,
+    )
+    Member.objects.bulk_create(
+        [
+            Member(account=account, organization=organization, added_by=account)
+            for account, organization in zip(accounts, organizations)
+        ],
+        batch_size=1000,
+    )
+    return organizations
+
+
+# Full-text search, trigram indexes and EXPLAIN plans are Postgres only
+requires_postgres = unittest.skipUnless(
+    connection.vendor == "postgresql", "Requires Postgres"
+)
+
+
+@requires_postgres
+class QueryPlanTestCase(TestCase):
+    """
+    Asserts the EXPLAIN plans of hot queries, so model and query changes can't
+    silently drop them to sequential scans or in-memory sorts.
+
+    Subclasses seed a realistic volume in setUpTestData and call analyze() so
+    the planner has statistics to choose indexes from.
+    """
+
+    @classmethod
+    def analyze(cls, *models):
+        with connection.cursor() as cursor:
+            for model in models:
+                cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+
+    def explain(self, queryset):
+        return parse_json(queryset.explain(format="json"))[0]["Plan"]
+
+    def assertUsesIndex(self, queryset, model, index_name=None):
+        plan = self.explain(queryset)
+        scans = [
+            node
+            for node in plan_nodes(plan)
+            if node.get("Relation Name") == model._meta.db_table
+        ]
+        self.assertTrue(scans, f"{model.__name__} is not scanned: {plan}")
+        for node in scans:
+            self.assertIn(node["Node Type"], INDEX_SCAN_NODES, plan)
+            if index_name is not None and node["Node Type"] != "Bitmap Heap Scan":
+                self.assertEqual(node["Index Name"], index_name, plan)
+
+    def assertNoSort(self, queryset):
+        plan = self.explain(queryset)
+        sorts = [
+            node
+            for node in plan_nodes(plan)
+            if node["Node Type"] in ("Sort", "Incremental Sort")
+        ]
+        self.assertFalse(sorts, plan)
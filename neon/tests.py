@@ -0,0 +1,215 @@
+from datetime import datetime, timedelta, timezone
+from django.test import SimpleTestCase
+from messenger.models import Conversation
+from neon import principals
+from neon.pagination import KeysetPagination
+from neon.principals import PrincipalCache
+from neon.renderers import FastJSONRenderer
+from neon.utils import sse_tools
+from neon.utils.pagination_tools import encode_cursor
+from neon.utils.sse_tools import FLUSH_DUE, FrameCoalescer, flush_ticks, token_frame
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from unittest import mock
+from user.models import Account
+import asyncio
+import uuid
+
+
+class FrameCoalescerTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(sse_tools.time, "monotonic", return_value=0.0)
+        self.monotonic = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_buffers_until_delay(self):
+        coalescer = FrameCoalescer(max_delay_ms=50, max_bytes=1024)
+
+        self.assertIsNone(coalescer.push("Hello"))
+        self.monotonic.return_value = 0.02
+        self.assertIsNone(coalescer.push(" wor"))
+        self.monotonic.return_value = 0.05
+        self.assertEqual(coalescer.push("ld"), token_frame("Hello world"))
+        self.assertIsNone(coalescer.flush())
+
+    def test_flushes_at_max_bytes_counted_in_utf8(self):
+        coalescer = FrameCoalescer(max_delay_ms=1000, max_bytes=6)
+
+        self.assertIsNone(coalescer.push("éé"))
+        self.assertEqual(coalescer.push("é"), token_frame("ééé"))
+
+    def test_remaining(self):
+        coalescer = FrameCoalescer(max_delay_ms=50, max_bytes=1024)
+        self.assertIsNone(coalescer.remaining())
+
+        coalescer.push("a")
+        self.monotonic.return_value = 0.03
+        self.assertAlmostEqual(coalescer.remaining(), 0.02)
+        self.monotonic.return_value = 0.08
+        self.assertEqual(coalescer.remaining(), 0)
+
+    def test_flush_emits_remainder(self):
+        coalescer = FrameCoalescer(max_delay_ms=50, max_bytes=1024)
+        coalescer.push("tail")
+
+        self.assertEqual(coalescer.flush(), token_frame("tail"))
+        self.assertIsNone(coalescer.remaining())
+
+
+class FlushTicksTests(SimpleTestCase):
+    def test_ticks_while_the_stream_stalls(self):
+        async def tokens():
+            yield "a"
+            await asyncio.sleep(0.05)
+            yield "b"
+
+        async def collect():
+            coalescer = FrameCoalescer(max_delay_ms=10, max_bytes=1024)
+            items = []
+            async for item in flush_ticks(tokens(), coalescer):
+                items.append(item)
+                if item is FLUSH_DUE:
+                    coalescer.flush()
+                else:
+                    coalescer.push(item)
+            return items
+
+        items = asyncio.run(collect())
+
+        self.assertEqual(items[0], "a")
+        self.assertIs(items[1], FLUSH_DUE)
+        self.assertEqual(items[-1], "b")
+
+
+def rows(count):
+    started_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "pk": uuid.UUID(int=index),
+            "created_at": started_at + timedelta(minutes=index),
+        }
+        for index in range(count)
+    ]
+
+
+class KeysetPaginationTests(SimpleTestCase):
+    def paginate(self, page_rows, **params):
+        request = Request(APIRequestFactory().get("/", params))
+        pagination = KeysetPagination()
+        with mock.patch.object(
+            KeysetPagination, "page_queryset", return_value=page_rows
+        ) as page_queryset:
+            page = pagination.paginate_queryset(Conversation.objects.all(), request)
+        return pagination, page, page_queryset.call_args.args
+
+    def test_cursor_round_trip(self):
+        row = rows(1)[0]
+        cursor = KeysetPagination().cursor_for(row)
+
+        self.assertEqual(
+            KeysetPagination().parse_cursor(Conversation.objects.all(), cursor),
+            [row["created_at"], row["pk"]],
+        )
+
+    def test_malformed_cursors_are_ignored(self):
+        for cursor in [
+            "not base64!",
+            "e30=",
+            encode_cursor(["2024-01-01"]),
+            encode_cursor(["yesterday", "nope"]),
+            encode_cursor(["2024-01-01T00:00:00+00:00", "nope"]),
+            encode_cursor([None, str(uuid.uuid4())]),
+        ]:
+            _, _, (_, before, after, _) = self.paginate(rows(1), before=cursor)
+            self.assertIsNone(before)
+            self.assertIsNone(after)
+
+    def test_first_page(self):
+        newest_first = list(reversed(rows(11)))
+        pagination, page, _ = self.paginate(newest_first)
+
+        self.assertEqual(page, newest_first[:10])
+        self.assertTrue(pagination.has_older)
+        self.assertFalse(pagination.has_newer)
+
+        data = pagination.get_paginated_response(page).data
+        self.assertEqual(data["before"], pagination.cursor_for(page[-1]))
+        self.assertEqual(data["after"], pagination.cursor_for(page[0]))
+
+    def test_before_cursor_loads_older_rows(self):
+        cursor = KeysetPagination().cursor_for(rows(20)[-1])
+        older = list(reversed(rows(5)))
+        pagination, page, (_, before, _, page_size) = self.paginate(
+            older, before=cursor, page_size=10
+        )
+
+        self.assertEqual(before, [rows(20)[-1]["created_at"], rows(20)[-1]["pk"]])
+        self.assertEqual(page_size, 10)
+        self.assertEqual(page, older)
+        self.assertFalse(pagination.has_older)
+        self.assertTrue(pagination.has_newer)
+        self.assertIsNone(pagination.get_paginated_response(page).data["before"])
+
+    def test_after_cursor_loads_newer_rows_newest_first(self):
+        cursor = KeysetPagination().cursor_for(rows(1)[0])
+        oldest_first = rows(12)[1:]
+        pagination, page, (_, _, after, _) = self.paginate(oldest_first, after=cursor)
+
+        self.assertEqual(after, [rows(1)[0]["created_at"], rows(1)[0]["pk"]])
+        self.assertEqual(page, list(reversed(oldest_first[:10])))
+        self.assertTrue(pagination.has_newer)
+        self.assertTrue(pagination.has_older)
+
+    def test_empty_after_page_keeps_the_cursor(self):
+        cursor = KeysetPagination().cursor_for(rows(1)[0])
+        pagination, page, _ = self.paginate([], after=cursor)
+
+        data = pagination.get_paginated_response(page).data
+        self.assertEqual(data["after"], cursor)
+        self.assertIsNone(data["before"])
+        self.assertFalse(data["has_newer"])
+
+
+class PrincipalCacheTests(SimpleTestCase):
+    def setUp(self):
+        for target in ("cache", "get_redis_connection"):
+            patcher = mock.patch.object(principals, target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        principals.cache.get.return_value = None
+        principals.get_redis_connection().smembers.return_value = set()
+        self.principal_cache = PrincipalCache(max_local_entries=10)
+
+    def test_hits_return_separate_instances(self):
+        account = Account(pk=1, username="ada")
+        self.principal_cache.set("token", account)
+
+        first = self.principal_cache.get("token")
+        first.username = "changed"
+        first._state.fields_cache["member"] = object()
+        second = self.principal_cache.get("token")
+
+        self.assertIsNot(first, second)
+        self.assertEqual(second.username, "ada")
+        self.assertEqual(second._state.fields_cache, {})
+
+    def test_invalidate_account_keeps_other_accounts(self):
+        self.principal_cache.set("ada", Account(pk=1, username="ada"))
+        self.principal_cache.set("bob", Account(pk=2, username="bob"))
+
+        self.principal_cache.invalidate_account(1)
+
+        self.assertIsNone(self.principal_cache.get("ada"))
+        self.assertEqual(self.principal_cache.get("bob").username, "bob")
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_matches_drf_formats(self):
+        data = {
+            "created_at": datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc),
+            "day": datetime(2024, 1, 1).date(),
+            "id": uuid.UUID(int=1),
+        }
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django_redis import get_redis_connection
+from .parsing_tools import dump_json, parse_json
+
+# Claims the dedupe key and pushes the job atomically, so a job is never queued
+# without its key or the other way round.
+ENQUEUE_SCRIPT = """
+if not redis.call('SET', KEYS[1], '1', 'NX', 'EX', tonumber(ARGV[1])) then
+    return 0
+end
+redis.call('LPUSH', KEYS[2], ARGV[2])
+return 1
+"""
+
+
+class JobQueue:
+    """
+    Minimal Redis-backed job queue on top of the configured CACHES connection.
+
+    Jobs are deduplicated by key: while a job with the same key is still waiting
+    in the queue, enqueueing it again is a no-op. The key is released as soon as
+    a worker picks the job up, so work arriving mid-run is queued again. Keys
+    expire after dedupe_ttl seconds, so a job lost with the queue (eviction,
+    Redis restart) can't block its key forever.
+    """
+
+    def __init__(self, name, alias="default", dedupe_ttl=None):
+        self.queue_key = f"jobs:{name}:queue"
+        self.pending_prefix = f"jobs:{name}:pending"
+        self.alias = alias
+        self.dedupe_ttl = dedupe_ttl or settings.JOB_QUEUE_DEDUPE_TTL
+
+    @property
+    def connection(self):
+        return get_redis_connection(self.alias)
+
+    def pending_key(self, dedupe_key):
+        return f"{self.pending_prefix}:{dedupe_key}"
+
+    def enqueue(self, dedupe_key, payload):
+        script = self.connection.register_script(ENQUEUE_SCRIPT)
+        return bool(
+            script(
+                keys=[self.pending_key(dedupe_key), self.queue_key],
+                args=[
+                    self.dedupe_ttl,
+                    dump_json({"dedupe_key": dedupe_key, "payload": payload}),
+                ],
+            )
+        )
+
+    def dequeue(self, timeout=5):
+        connection = self.connection
+
+        item = connection.brpop(self.queue_key, timeout=timeout)
+        if item is None:
+            return None
+
+        job = parse_json(item[1])
+        connection.delete(self.pending_key(job["dedupe_key"]))
+        return job["payload"]
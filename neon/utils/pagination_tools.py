@@ -0,0 +1,26 @@
+from neon.utils.parsing_tools import dump_json, parse_json
+import base64
+
+
+def encode_cursor(values):
+    """
+    Encodes the sort key of the last row of a page into an opaque, URL safe
+    cursor for keyset pagination.
+    """
+    return base64.urlsafe_b64encode(dump_json(list(values))).decode("ascii")
+
+
+def decode_cursor(cursor, size=None):
+    """
+    Returns the values encoded by encode_cursor, or None for a missing or
+    malformed cursor, including one that doesn't hold a list of size values.
+    """
+    if not cursor:
+        return None
+    try:
+        values = parse_json(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        return None
+    if not isinstance(values, list) or (size is not None and len(values) != size):
+        return None
+    return values
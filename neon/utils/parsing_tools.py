@@ -1,7 +1,43 @@
 import json
 
+# orjson is several times faster than the stdlib json module on both ends, the
+# stdlib is kept as a fallback so the app still runs where it is not installed.
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
-def stringify_json(data):
-    json_str = json.dumps(data)
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
 
-    return json_str
+
+def stringify_json(data, default=None):
+    return dump_json(data, default).decode("utf-8")
+
+
+def dump_json(data, default=None, sort_keys=False, passthrough_datetime=False):
+    """
+    Serializes data to UTF-8 encoded JSON bytes. sort_keys gives a canonical
+    form, e.g. for cache keys. passthrough_datetime hands datetime, date and
+    time values to default instead of orjson's own format.
+    """
+    if orjson is not None:
+        option = ORJSON_OPTIONS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if passthrough_datetime:
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        return orjson.dumps(data, default=default, option=option)
+
+    return json.dumps(
+        data, default=default, ensure_ascii=False, sort_keys=sort_keys
+    ).encode("utf-8")
+
+
+def parse_json(data):
+    """
+    Parses JSON from str or bytes. Raises ValueError on malformed input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
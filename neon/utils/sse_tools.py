@@ -0,0 +1,133 @@
+import asyncio
+import re
+import time
+from django.conf import settings
+from .parsing_tools import stringify_json
+
+# The envelope of a token frame never changes, only the token is encoded per frame
+TOKEN_FRAME_PREFIX = b'data: {"status": true, "token": '
+TOKEN_FRAME_SUFFIX = b"}\n\n"
+
+WORD = re.compile(r"\S+\s*|\s+")
+
+
+def token_frame(token):
+    return TOKEN_FRAME_PREFIX + stringify_json(token).encode("utf-8") + TOKEN_FRAME_SUFFIX
+
+
+def event_frame(data):
+    return f"data: {stringify_json(data)}\n\n".encode("utf-8")
+
+
+class FrameCoalescer:
+    """
+    Buffers streamed tokens and emits them as one token frame once max_delay_ms
+    have passed since the first buffered token or max_bytes are buffered.
+
+    The frame has the same shape as a single-token frame, clients that append
+    tokens as they arrive work unchanged. push() checks the delay when a token
+    arrives, async streams also flush on a timer through flush_ticks. Call
+    flush() once the stream ends to emit the remainder.
+    """
+
+    def __init__(self, max_delay_ms=None, max_bytes=None):
+        if max_delay_ms is None:
+            max_delay_ms = settings.SSE_COALESCE_MAX_DELAY_MS
+        if max_bytes is None:
+            max_bytes = settings.SSE_COALESCE_MAX_BYTES
+        self.max_delay = max_delay_ms / 1000
+        self.max_bytes = max_bytes
+        self.buffer = []
+        self.size = 0
+        self.started_at = None
+
+    def push(self, token):
+        """
+        Returns:
+            bytes or None: A frame when the buffer is due to be flushed.
+        """
+        if not self.buffer:
+            self.started_at = time.monotonic()
+        self.buffer.append(token)
+        self.size += len(token.encode("utf-8"))
+
+        if (
+            self.size >= self.max_bytes
+            or time.monotonic() - self.started_at >= self.max_delay
+        ):
+            return self.flush()
+        return None
+
+    def remaining(self):
+        """
+        Returns:
+            float or None: Seconds until the buffer is due, None when empty.
+        """
+        if not self.buffer:
+            return None
+        return max(0, self.started_at + self.max_delay - time.monotonic())
+
+    def flush(self):
+        if not self.buffer:
+            return None
+        frame = token_frame("".join(self.buffer))
+        self.buffer = []
+        self.size = 0
+        self.started_at = None
+        return frame
+
+
+# Yielded by flush_ticks when the coalescer's delay elapsed between tokens
+FLUSH_DUE = object()
+
+
+async def flush_ticks(tokens, coalescer):
+    """
+    Yields the tokens of an async iterator, plus FLUSH_DUE whenever the
+    coalescer's delay elapses while waiting for the next one, so buffered text
+    is still sent during provider stalls such as tool execution.
+    """
+    iterator = tokens.__aiter__()
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            # Waiting doesn't cancel the pending token on timeout
+            done, _ = await asyncio.wait({pending}, timeout=coalescer.remaining())
+            if not done:
+                yield FLUSH_DUE
+                continue
+
+            try:
+                token = pending.result()
+            except StopAsyncIteration:
+                return
+            finally:
+                pending = None
+            yield token
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+def wants_coalescing(value):
+    """
+    Interprets the per-request "coalesce" opt-in flag sent as JSON or form data.
+    """
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+def replay_frames(text, coalesce=False):
+    """
+    Frames an already complete reply as if it was streamed: word-sized token
+    frames, or a single frame for clients that opted into coalescing.
+    """
+    if coalesce:
+        yield token_frame(text)
+        return
+
+    for word in WORD.findall(text):
+        yield token_frame(word)
@@ -1,3 +1,18 @@
-from django.test import TestCase
+from neon.testing import QueryPlanTestCase, seed_accounts, seed_organizations
+from organization.models import Member
 
-# Create your tests here.
+ACCOUNTS = 5000
+
+
+class OrganizationQueryPlanTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        accounts = seed_accounts(ACCOUNTS)
+        seed_organizations(accounts)
+        cls.account = accounts[ACCOUNTS // 2]
+
+        cls.analyze(Member)
+
+    def test_member_by_account(self):
+        queryset = Member.objects.filter(account=self.account)
+        self.assertUsesIndex(queryset, Member)
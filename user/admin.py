@@ -1,6 +1,22 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import Account, Verification, Token
 
+
+class TokenAdmin(admin.ModelAdmin):
+    list_display = ["prefix", "account", "expires_at", "last_used_at", "date_generated"]
+    readonly_fields = ["prefix", "last_used_at", "date_generated"]
+    fields = ["account", "expires_at", "prefix", "last_used_at", "date_generated"]
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            raw_token = obj.generate()
+            messages.warning(
+                request,
+                f"Developer token: {raw_token} - copy it now, it will not be shown again.",
+            )
+        super().save_model(request, obj, form, change)
+
+
 admin.site.register(Account)
 admin.site.register(Verification)
-admin.site.register(Token)
+admin.site.register(Token, TokenAdmin)
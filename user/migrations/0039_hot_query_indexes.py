@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0038_alter_token_token_alter_verification_ver_code'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='token',
+            index=models.Index(fields=['token'], name='token_token'),
+        ),
+    ]
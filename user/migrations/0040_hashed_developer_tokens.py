@@ -0,0 +1,59 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:30
+
+from django.db import migrations, models
+import hashlib
+
+
+def hash_existing_tokens(apps, schema_editor):
+    """
+    Replaces cleartext tokens with their SHA-256 digest, so clients keep
+    using the tokens they have. Tokens sharing a value never authenticated
+    (the lookup returned several rows), only the oldest of them is kept
+    usable so the digest can be unique.
+    """
+    Token = apps.get_model("user", "Token")
+    seen = set()
+    for token in Token.objects.order_by("date_generated", "id").iterator():
+        raw_token = token.token
+        digest = hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+        if digest in seen:
+            digest = hashlib.sha256(f"{raw_token}:{token.id}".encode("utf-8")).hexdigest()
+        seen.add(digest)
+        token.prefix = raw_token[:8]
+        token.token = digest
+        token.save(update_fields=["token", "prefix"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0039_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='token',
+            name='token_token',
+        ),
+        migrations.AddField(
+            model_name='token',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='token',
+            name='last_used_at',
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='token',
+            name='prefix',
+            field=models.CharField(blank=True, default='', max_length=12),
+        ),
+        migrations.RunPython(hash_existing_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='token',
+            name='token',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+    ]
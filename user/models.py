@@ -1,6 +1,7 @@
 import random
 import uuid
 import secrets
+import hashlib
 from django.core.exceptions import ValidationError
 from django.db import models, IntegrityError
 from django.core.validators import EmailValidator
@@ -86,10 +87,44 @@ class Verification(models.Model):
     is_used = models.BooleanField(default=False)
 
 
+def hash_token(raw_token):
+    return hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+
+
 class Token(models.Model):
+    """
+    Developer API token. Only the SHA-256 digest is stored: the raw token is
+    returned once by generate() and can't be recovered afterwards. Saving a
+    token without one generates it, the raw value is then left in raw_token.
+    """
+
     id = models.CharField(
         max_length=150, default=uuid.uuid4, unique=True, primary_key=True
     )
-    token = models.CharField(default=secrets.token_hex(16), null=False)
+    token = models.CharField(max_length=64, unique=True, null=False)
+    # First characters of the raw token, to tell tokens apart in listings
+    prefix = models.CharField(max_length=12, blank=True, default="")
     account = models.ForeignKey(Account, null=False, on_delete=models.DO_NOTHING)
     date_generated = models.DateTimeField(default=now)
+    expires_at = models.DateTimeField(null=True, blank=True, default=None)
+    # Written in batches, see user/tokens.py
+    last_used_at = models.DateTimeField(null=True, blank=True, default=None)
+
+    def generate(self):
+        """
+        Sets a new random token and returns it in the clear.
+        """
+        raw_token = secrets.token_urlsafe(32)
+        self.token = hash_token(raw_token)
+        self.prefix = raw_token[:8]
+        self.raw_token = raw_token
+        return raw_token
+
+    def save(self, *args, **kwargs):
+        # Never store an empty digest, e.g. from Token.objects.create(account=...)
+        if not self.token:
+            self.generate()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.prefix}... ({self.account_id})"
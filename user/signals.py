@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from neon.conditional import resource_versions
+from neon.principals import principal_cache
+from .models import Account, Token
+
+
+@receiver(pre_save, sender=Account)
+def remember_username(sender, instance, update_fields=None, **kwargs):
+    # A rename must also invalidate copies cached under the old username
+    instance._previous_username = None
+    if update_fields is None or "username" in update_fields:
+        instance._previous_username = (
+            Account.objects.filter(pk=instance.pk)
+            .values_list("username", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Account)
+def bump_account_version(sender, instance, **kwargs):
+    usernames = {instance.username, getattr(instance, "_previous_username", None)}
+    scopes = [f"account:{username}" for username in usernames if username]
+    transaction.on_commit(lambda: resource_versions.bump(*scopes))
+
+
+# Covers deactivation and username changes, JWTs are resolved by username
+@receiver(post_save, sender=Account)
+def invalidate_account_principals(sender, instance, **kwargs):
+    transaction.on_commit(lambda: principal_cache.invalidate_account(instance.pk))
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token_principal(sender, instance, **kwargs):
+    transaction.on_commit(lambda: principal_cache.invalidate_digest(instance.token))
@@ -1,3 +1,36 @@
-from django.test import TestCase
+from neon.backends import developer_token_queryset, session_account_queryset
+from neon.testing import QueryPlanTestCase, seed_accounts
+from user.models import Account, Token, hash_token
+from user.views import login_account_queryset
+import secrets
 
-# Create your tests here.
+ACCOUNTS = 5000
+
+
+class UserQueryPlanTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        accounts = seed_accounts(ACCOUNTS)
+        cls.account = accounts[ACCOUNTS // 2]
+        cls.tokens = Token.objects.bulk_create(
+            [
+                Token(token=hash_token(secrets.token_urlsafe(32)), account=account)
+                for account in accounts
+            ],
+            batch_size=1000,
+        )
+
+        cls.analyze(Account, Token)
+
+    def test_session_account(self):
+        queryset = session_account_queryset(self.account.username)
+        self.assertUsesIndex(queryset, Account)
+
+    def test_login_account(self):
+        queryset = login_account_queryset(self.account.email)
+        self.assertUsesIndex(queryset, Account)
+
+    def test_token_resolve(self):
+        queryset = developer_token_queryset(self.tokens[ACCOUNTS // 2].token)
+        self.assertUsesIndex(queryset, Token)
+        self.assertUsesIndex(queryset, Account)
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.utils.timezone import now
+from .models import Token
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TokenUsage:
+    """
+    Batches Token.last_used_at writes: tokens used by this process are
+    collected and written with one UPDATE at most every
+    DEVELOPER_TOKEN_LAST_USED_INTERVAL seconds, so last_used_at is accurate
+    to that interval and requests never wait on it otherwise.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def touch(self, digest):
+        interval = self.interval or settings.DEVELOPER_TOKEN_LAST_USED_INTERVAL
+        with self._lock:
+            self._pending.add(digest)
+            current = time.monotonic()
+            if current - self._flushed_at < interval:
+                return
+            digests, self._pending = self._pending, set()
+            self._flushed_at = current
+
+        self.flush(digests)
+
+    def flush(self, digests):
+        try:
+            Token.objects.filter(token__in=digests).update(last_used_at=now())
+        except Exception as ex:
+            logger.warning("Failed to record token usage: %s", ex)
+
+
+token_usage = TokenUsage()
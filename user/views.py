@@ -10,6 +10,7 @@ from .models import Account
 from .serializers import (
     AccountSerializer,
 )
+from neon.conditional import conditional_get
 from neon.utils.jwt_tools import JWTTools
 from neon.utils.generators import generate_random_digit
 from rest_framework.pagination import PageNumberPagination
@@ -21,6 +22,12 @@ import bcrypt
 jwt = JWTTools
 
 
+def login_account_queryset(email_username):
+    return Account.objects.filter(
+        Q(email=email_username) | Q(username=email_username)
+    )
+
+
 class Pagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
@@ -36,15 +43,19 @@ class UserAuthentication(APIView):
         return super().get_permissions()
 
     def get(self, request, username=None):
-        user = get_object_or_404(Account, username=username)
+        def build():
+            user = get_object_or_404(Account, username=username)
 
-        # Format birthdate parts
-        serialized_user = AccountSerializer(user)
+            # Format birthdate parts
+            serialized_user = AccountSerializer(user)
 
-        # Build response JSON matching your example
-        data = serialized_user.data
+            # Build response JSON matching your example
+            data = serialized_user.data
 
-        return Response(data, status=status.HTTP_200_OK)
+            return Response(data, status=status.HTTP_200_OK)
+
+        # Unchanged accounts are answered with 304 before any query
+        return conditional_get(request, [f"account:{username}"], build)
 
     def post(self, request):
         try:
@@ -60,9 +71,7 @@ class UserAuthentication(APIView):
                     status=status.HTTP_401_UNAUTHORIZED,
                 )
 
-            user = Account.objects.get(
-                Q(email=email_username) | Q(username=email_username)
-            )
+            user = login_account_queryset(email_username).get()
 
             if user:
                 hashed = user.password.encode("utf-8")